@@ -0,0 +1,119 @@
+"""
+Local chunk store
+Keeps chunk text and full metadata in SQLite, keyed by namespace and vector
+ID, so vectors in the index only carry the small fields that searches filter
+on. Queries return IDs and scores and the text is looked up here.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default limit on host parameters is 999
+_MAX_PARAMS = 900
+
+
+class ChunkStore:
+    """SQLite-backed chunk text and metadata by vector ID"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        # WAL lets the Streamlit app read while ingestion writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                namespace TEXT NOT NULL,
+                id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                PRIMARY KEY (namespace, id)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(namespace, source)")
+        self._conn.commit()
+
+    def put_many(self, namespace: str, source: str, chunks: List[Dict[str, Any]]) -> None:
+        """
+        Store or replace chunks of one source file
+
+        Args:
+            namespace: Namespace the chunks' vectors are in
+            source: Source file path
+            chunks: {"id", "text", "metadata"} dicts
+        """
+        rows = [
+            (namespace, chunk["id"], source, chunk["text"], json.dumps(chunk.get("metadata") or {}, ensure_ascii=False))
+            for chunk in chunks
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (namespace, id, source, text, metadata) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def get_many(self, namespace: str, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up chunks and return {id: {"text", "metadata"}} for the ones stored"""
+        ids = list(ids)
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), _MAX_PARAMS):
+                batch = ids[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                for chunk_id, text, metadata in self._conn.execute(
+                    f"SELECT id, text, metadata FROM chunks WHERE namespace = ? AND id IN ({placeholders})",
+                    [namespace, *batch]
+                ):
+                    found[chunk_id] = {"text": text, "metadata": json.loads(metadata)}
+        return found
+
+    def has_source(self, namespace: str, source: str) -> bool:
+        """True if chunks of the source file are stored for namespace"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM chunks WHERE namespace = ? AND source = ? LIMIT 1", (namespace, source)
+            ).fetchone() is not None
+
+    def prune_document(self, namespace: str, source: str, keep_ids: Iterable[str]) -> None:
+        """Delete a source file's chunks except keep_ids"""
+        keep_ids = set(keep_ids)
+        with self._lock:
+            stale = [
+                (namespace, chunk_id) for (chunk_id,) in self._conn.execute(
+                    "SELECT id FROM chunks WHERE namespace = ? AND source = ?", (namespace, source)
+                ) if chunk_id not in keep_ids
+            ]
+            self._conn.executemany("DELETE FROM chunks WHERE namespace = ? AND id = ?", stale)
+            self._conn.commit()
+
+    def delete_document(self, namespace: str, source: str) -> None:
+        self.prune_document(namespace, source, ())
+
+    def drop_namespace(self, namespace: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Number of stored chunks and their total text size in bytes"""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(text AS BLOB))), 0) FROM chunks"
+            ).fetchone()
+        return {"entries": count, "bytes": size}
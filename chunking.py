@@ -0,0 +1,135 @@
+"""
+Token-aware text chunker
+Finds paragraph, line and sentence boundaries in a single regex pass, sizes
+chunks in tokens and cuts each chunk at the strongest boundary close to the
+target size. Overlap is made of whole sentences, so no partial sentences are
+repeated between chunks. The same input always gives the same chunks.
+"""
+
+import re
+from bisect import bisect_right
+from typing import List, Tuple
+
+from text_utils import count_tokens
+
+# Boundary strengths, higher is a better place to cut
+PARAGRAPH = 3
+LINE = 2
+SENTENCE = 1
+WORD = 0
+
+# Paragraph breaks, line breaks, or whitespace after sentence-ending punctuation
+_BOUNDARY_RE = re.compile(r"\n[ \t]*\n\s*|\n\s*|(?<=[.!?:;])\s+")
+
+# Chunks are cut once they are at least this full, preferring strong boundaries
+MIN_FILL = 0.75
+
+
+def _segments(text: str) -> List[Tuple[int, int, int]]:
+    """Split text into (start, end, strength_of_boundary_after) segments in one pass"""
+    segments = []
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        if match.start() > start:
+            separator = match.group()
+            if separator.count("\n") >= 2:
+                strength = PARAGRAPH
+            elif "\n" in separator:
+                strength = LINE
+            else:
+                strength = SENTENCE
+            segments.append((start, match.start(), strength))
+        start = match.end()
+    if start < len(text):
+        segments.append((start, len(text), PARAGRAPH))
+    return segments
+
+
+def _split_long_segment(text: str, start: int, end: int, strength: int, tokens: int,
+                        max_tokens: int) -> List[Tuple[int, int, int, int]]:
+    """Split a segment longer than max_tokens at whitespace into roughly equal parts"""
+    parts = -(-tokens // max_tokens)
+    step = (end - start) / parts
+    pieces = []
+    piece_start = start
+    for i in range(1, parts):
+        cut = int(start + step * i)
+        # Snap to the next whitespace so words are not cut in half
+        space = text.find(" ", cut, end)
+        cut = space if space != -1 else cut
+        if cut > piece_start:
+            pieces.append((piece_start, cut, WORD))
+            piece_start = cut
+    pieces.append((piece_start, end, strength))
+    return [(s, e, b, count_tokens(text[s:e])) for s, e, b in pieces]
+
+
+def chunk_text(text: str, chunk_tokens: int = 250, overlap_tokens: int = 40) -> List[str]:
+    """
+    Split text into chunks of about chunk_tokens tokens
+
+    Args:
+        text: Text to split
+        chunk_tokens: Target (and maximum) chunk size in tokens
+        overlap_tokens: Maximum overlap between consecutive chunks, in whole sentences
+
+    Returns:
+        List of chunk strings in document order
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    # (start, end, boundary strength, tokens) for every segment
+    units = []
+    for start, end, strength in _segments(text):
+        tokens = count_tokens(text[start:end])
+        if tokens > chunk_tokens:
+            units.extend(_split_long_segment(text, start, end, strength, tokens, chunk_tokens))
+        else:
+            units.append((start, end, strength, tokens))
+
+    # prefix[i] = tokens in units[:i], so any span's size is one subtraction
+    prefix = [0]
+    for unit in units:
+        prefix.append(prefix[-1] + unit[3])
+
+    if prefix[-1] <= chunk_tokens:
+        return [text]
+
+    chunks = []
+    first = 0
+    while first < len(units):
+        # Largest end such that units[first:end] fits the target
+        limit = bisect_right(prefix, prefix[first] + chunk_tokens) - 1
+        end = max(limit, first + 1)
+
+        if end < len(units):
+            # Strongest boundary among cut points that leave the chunk at least MIN_FILL full;
+            # on ties the later (fuller) cut wins
+            min_tokens = prefix[first] + chunk_tokens * MIN_FILL
+            best_end, best_strength = end, units[end - 1][2]
+            candidate = end - 1
+            while candidate > first and prefix[candidate] >= min_tokens:
+                if units[candidate - 1][2] > best_strength:
+                    best_end, best_strength = candidate, units[candidate - 1][2]
+                candidate -= 1
+            end = best_end
+
+        chunk = text[units[first][0]:units[end - 1][1]].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        if end >= len(units):
+            break
+
+        # Start the next chunk with the trailing sentences that fit the overlap,
+        # never going back to (or before) this chunk's first unit
+        next_first = end
+        while (next_first - 1 > first
+               and units[next_first - 2][2] != WORD
+               and prefix[end] - prefix[next_first - 1] <= overlap_tokens):
+            next_first -= 1
+        first = next_first
+
+    return chunks
@@ -0,0 +1,166 @@
+"""
+Token-budgeted prompt context from wizard data
+Breaks earlier responses, user input and document context into facts (one
+per field), ranks them by relevance to the current request and recency,
+drops facts that repeat text already included and fills a token budget, so
+prompts stay the same size however much the application has grown. Facts
+that do not fit whole are cut back sentence by sentence.
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from context_packer import pack_context
+from text_utils import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Facts are split into pieces of about this many tokens, the unit they are cut back by
+PIECE_TOKENS = 60
+# Share of a fact's score that comes from relevance to the query; the rest is recency
+RELEVANCE_WEIGHT = 0.7
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _field_label(name: str) -> str:
+    return str(name).replace("_", " ").capitalize()
+
+
+def _render(value: Any) -> str:
+    """Plain text of a value: nested models and dicts as "Field: value" lines"""
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        lines = [f"{_field_label(key)}: {_render(item)}" for key, item in value.items() if _render(item)]
+        return "\n".join(lines)
+    if isinstance(value, (list, tuple)):
+        return "\n".join(text for text in (_render(item) for item in value) if text)
+    return "" if value is None else str(value).strip()
+
+
+def collect_facts(source: str, value: Any, priority: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Facts of one source (a step's response, input or document context)
+
+    Args:
+        source: Heading the facts are listed under
+        value: Pydantic model or dict (one fact per field), list (one fact per
+            item) or text (one fact)
+        priority: Added to the facts' scores, so they are kept before others
+
+    Returns:
+        {"source", "field", "text", "priority"} dicts; empty and error values are left out
+    """
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        items = list(value.items())
+    elif isinstance(value, (list, tuple)):
+        items = [(f"item {position + 1}", item) for position, item in enumerate(value)]
+    else:
+        items = [("", value)]
+
+    facts = []
+    for field, item in items:
+        if isinstance(item, (list, tuple)) and item and isinstance(item[0], (BaseModel, dict)):
+            # Lists of records (work packages): one fact per record
+            facts.extend(collect_facts(source, {f"{field} {n + 1}": record for n, record in enumerate(item)}, priority))
+            continue
+        text = _render(item)
+        # Failed generations are stored as error strings
+        if text and not text.startswith("❌"):
+            facts.append({"source": source, "field": str(field), "text": text, "priority": priority})
+    return facts
+
+
+def _pieces(text: str) -> List[str]:
+    """Consecutive pieces of about PIECE_TOKENS tokens, split at sentence ends"""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_RE.split(text):
+        if not sentence.strip():
+            continue
+        candidate = f"{current} {sentence}".strip()
+        if current and count_tokens(candidate) > PIECE_TOKENS:
+            pieces.append(current)
+            candidate = sentence.strip()
+        current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _relevance(facts: List[Dict[str, Any]], query: str) -> List[float]:
+    """Query term overlap of each fact, weighted by how rare the term is among the facts, scaled to 0-1"""
+    query_terms = set(_WORD_RE.findall(query.lower()))
+    fact_terms = [set(_WORD_RE.findall(fact["text"].lower())) for fact in facts]
+    if not query_terms or not facts:
+        return [0.0] * len(facts)
+    document_frequency = Counter(term for terms in fact_terms for term in terms & query_terms)
+    scores = [
+        sum(math.log(1 + len(facts) / document_frequency[term]) for term in terms & query_terms)
+        / math.sqrt(len(terms) or 1)
+        for terms in fact_terms
+    ]
+    best = max(scores)
+    return [score / best if best else 0.0 for score in scores]
+
+
+def assemble_context(facts: List[Dict[str, Any]], query: str, token_budget: int,
+                     packed: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Select and format facts for a prompt
+
+    Args:
+        facts: Facts from collect_facts, oldest source first
+        query: Text of the current request; facts sharing its terms rank higher
+        token_budget: Maximum tokens of fact text
+        packed: Passages already in the prompt (see context_packer.pack_context);
+            facts repeating them are dropped
+
+    Returns:
+        Selected facts under "--- source ---" headings, sources and fields in input order
+    """
+    if not facts:
+        return ""
+    sources = list(dict.fromkeys(fact["source"] for fact in facts))
+    relevance = _relevance(facts, query)
+
+    results = []
+    for position, (fact, fact_relevance) in enumerate(zip(facts, relevance)):
+        recency = (sources.index(fact["source"]) + 1) / len(sources)
+        score = RELEVANCE_WEIGHT * fact_relevance + (1 - RELEVANCE_WEIGHT) * recency + fact["priority"]
+        label = f"{_field_label(fact['field'])}: " if fact["field"] else ""
+        # Pieces of a fact merge back into one passage; one that does not fit loses pieces from its end
+        for index, piece in enumerate(_pieces(f"{label}{fact['text']}")):
+            results.append({
+                "id": f"{position}:{index}",
+                "text": piece,
+                # Earlier pieces score marginally higher so the end of a fact is cut first
+                "score": score - index * 1e-6,
+                "namespace": fact["source"],
+                "document_name": str(position),
+                "chunk_index": index,
+            })
+
+    passages = pack_context(results, token_budget, packed=packed)
+
+    by_source: Dict[str, List[Dict[str, Any]]] = {}
+    for passage in passages:
+        by_source.setdefault(passage["namespace"], []).append(passage)
+    context = ""
+    for source in sources:
+        if source in by_source:
+            context += f"\n--- {source} ---\n"
+            for passage in sorted(by_source[source], key=lambda passage: int(passage["document_name"])):
+                context += f"{passage['text']}\n"
+
+    logger.debug(f"Assembled {len(passages)} of {len(facts)} facts, "
+                 f"{sum(passage['tokens'] for passage in passages)}/{token_budget} tokens")
+    return context.strip()
@@ -0,0 +1,162 @@
+"""
+Context packing
+Turns search hits into the passages that go into a prompt: hits on
+consecutive chunks of one document are merged into a single passage with the
+chunk overlap removed, passages that repeat text already packed are dropped,
+and the rest fill a token budget in score order.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from text_utils import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Shortest suffix/prefix match treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+# Longest overlap looked for between consecutive chunks
+MAX_OVERLAP_CHARS = 1200
+# Word n-gram size used to detect near-duplicate passages
+SHINGLE_SIZE = 5
+# Share of a passage's shingles already packed above which it counts as a duplicate
+DUPLICATE_THRESHOLD = 0.8
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _join_overlapping(first: str, second: str) -> str:
+    """Join consecutive chunks, dropping the text that starts second and ends first"""
+    first, second = first.rstrip(), second.lstrip()
+    longest = min(len(first), len(second), MAX_OVERLAP_CHARS)
+    tail = first[-longest:]
+    # Candidate overlaps start wherever second's opening characters occur in first's tail
+    probe = second[:MIN_OVERLAP_CHARS]
+    position = tail.find(probe)
+    while position != -1:
+        overlap = len(tail) - position
+        if second.startswith(tail[position:]):
+            return first + second[overlap:]
+        position = tail.find(probe, position + 1)
+    return f"{first}\n{second}"
+
+
+def _shingles(text: str) -> Set[tuple]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def merge_adjacent(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge hits on consecutive chunks of the same document
+
+    Args:
+        results: Search results with "text", "score", "namespace", "document_name"
+            and "chunk_index" (plus "metadata" with "file_path" when available)
+
+    Returns:
+        Passages with "text", "score" (best of the merged hits), "namespace",
+        "document_name", "chunk_indices", "ids" and the merged "hits", best score first
+    """
+    by_document: Dict[tuple, Dict[int, Dict[str, Any]]] = {}
+    passages = []
+    for result in results:
+        metadata = result.get("metadata") or {}
+        chunk_index = result.get("chunk_index", metadata.get("chunk_index"))
+        source = metadata.get("file_path") or result.get("document_name")
+        if chunk_index is None or not source:
+            # Without a position in a document the hit stands on its own
+            passages.append(_passage([result], result.get("namespace", "")))
+            continue
+        hits = by_document.setdefault((result.get("namespace", ""), source), {})
+        # The same chunk can come back from more than one query
+        if chunk_index not in hits or result["score"] > hits[chunk_index]["score"]:
+            hits[chunk_index] = dict(result, chunk_index=chunk_index)
+
+    for (namespace, _), hits in by_document.items():
+        run: List[Dict[str, Any]] = []
+        for chunk_index in sorted(hits):
+            if run and chunk_index != run[-1]["chunk_index"] + 1:
+                passages.append(_passage(run, namespace))
+                run = []
+            run.append(hits[chunk_index])
+        passages.append(_passage(run, namespace))
+
+    passages.sort(key=lambda passage: -passage["score"])
+    return passages
+
+
+def _passage(hits: List[Dict[str, Any]], namespace: str) -> Dict[str, Any]:
+    text = hits[0]["text"]
+    for hit in hits[1:]:
+        text = _join_overlapping(text, hit["text"])
+    return {
+        "text": text.strip(),
+        "score": max(hit["score"] for hit in hits),
+        "namespace": namespace,
+        "document_name": hits[0].get("document_name", ""),
+        "chunk_indices": [hit.get("chunk_index") for hit in hits],
+        "ids": [hit.get("id") for hit in hits],
+        "metadata": hits[0].get("metadata") or {},
+        "hits": hits,
+    }
+
+
+def _trim_to_budget(passage: Dict[str, Any], budget: int) -> Optional[Dict[str, Any]]:
+    """Drop chunks from the weaker end of a merged passage until it fits budget"""
+    hits = passage["hits"]
+    while len(hits) > 1:
+        hits = hits[1:] if hits[0]["score"] < hits[-1]["score"] else hits[:-1]
+        trimmed = _passage(hits, passage["namespace"])
+        if count_tokens(trimmed["text"]) <= budget:
+            return trimmed
+    return None
+
+
+def pack_context(results: List[Dict[str, Any]], token_budget: int,
+                 packed: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Select the passages for a prompt
+
+    Consecutive chunks are merged, near-duplicates of higher scoring (or
+    already packed) passages are dropped and passages are taken in score
+    order while they fit token_budget. A merged passage that does not fit
+    is trimmed from its weaker end; one that still does not fit is skipped
+    so a smaller one further down can still be used.
+
+    Args:
+        results: Search results (see merge_adjacent)
+        token_budget: Maximum tokens of passage text
+        packed: Passages already in the prompt, only used for duplicate detection
+
+    Returns:
+        Selected passages with a "tokens" count, best score first
+    """
+    seen: Set[tuple] = set()
+    for passage in packed or []:
+        seen |= _shingles(passage["text"])
+
+    selected = []
+    remaining = token_budget
+    for passage in merge_adjacent(results):
+        shingles = _shingles(passage["text"])
+        if not shingles or len(shingles & seen) / len(shingles) >= DUPLICATE_THRESHOLD:
+            continue
+        tokens = count_tokens(passage["text"])
+        if tokens > remaining:
+            passage = _trim_to_budget(passage, remaining)
+            if passage is None:
+                continue
+            shingles = _shingles(passage["text"])
+            tokens = count_tokens(passage["text"])
+        passage["tokens"] = tokens
+        selected.append(passage)
+        seen |= shingles
+        remaining -= tokens
+
+    logger.debug(f"Packed {len(selected)} passages from {len(results)} hits, "
+                 f"{token_budget - remaining}/{token_budget} tokens")
+    return selected
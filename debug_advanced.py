@@ -114,7 +114,10 @@ try:
         print(f'  Match {i+1}: Score {match.score:.4f}, ID: {match.id}')
         if hasattr(match, 'metadata') and match.metadata:
             print(f'    Namespace: {match.metadata.get("namespace", "unknown")}')
-            print(f'    Text: {match.metadata.get("chunk_text", "no text")[:100]}...')
+            # Chunk text is kept in the local chunk store (older vectors carry it in metadata)
+            chunk = rag.chunk_store.get_many(match.metadata.get("namespace", ""), [match.id]).get(match.id)
+            text = chunk["text"] if chunk else match.metadata.get("chunk_text", "no text")
+            print(f'    Text: {text[:100]}...')
 
 except Exception as e:
     print(f'Error with raw query: {e}')
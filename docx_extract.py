@@ -0,0 +1,188 @@
+"""
+Streaming DOCX extractor
+Reads word/document.xml straight from the .docx archive with an incremental
+XML parser and yields typed blocks (headings with their level, paragraphs and
+table rows) in document order. Parsed elements are released as soon as each
+block is emitted, so memory stays bounded regardless of document size.
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Any
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+P, T, TAB, BR, CR = _w("p"), _w("t"), _w("tab"), _w("br"), _w("cr")
+TBL, TR, TC, BODY = _w("tbl"), _w("tr"), _w("tc"), _w("body")
+PSTYLE, OUTLINE_LVL, VAL = _w("pStyle"), _w("outlineLvl"), _w("val")
+FALLBACK = f"{{{MC_NS}}}Fallback"
+
+# Outline level 9 means "body text" in Word
+BODY_TEXT_LEVEL = 9
+
+
+def _heading_levels(archive: zipfile.ZipFile) -> Dict[str, int]:
+    """Map paragraph style IDs to heading levels (1-based) using word/styles.xml"""
+    try:
+        root = ET.fromstring(archive.read("word/styles.xml"))
+    except KeyError:
+        return {}
+
+    based_on: Dict[str, str] = {}
+    levels: Dict[str, int] = {}
+    for style in root.iter(_w("style")):
+        if style.get(_w("type")) != "paragraph":
+            continue
+        style_id = style.get(_w("styleId"))
+        name = style.find(_w("name"))
+        name = (name.get(VAL) if name is not None else "").lower()
+        outline = style.find(f"{_w('pPr')}/{OUTLINE_LVL}")
+        parent = style.find(_w("basedOn"))
+
+        if outline is not None and int(outline.get(VAL, BODY_TEXT_LEVEL)) < BODY_TEXT_LEVEL:
+            levels[style_id] = int(outline.get(VAL)) + 1
+        elif name == "title":
+            levels[style_id] = 1
+        elif name.startswith("heading ") and name[8:].isdigit():
+            levels[style_id] = int(name[8:])
+        elif parent is not None:
+            based_on[style_id] = parent.get(VAL)
+
+    # Styles such as "Rubrik 2 numrerad" inherit their level from the base style
+    def resolve(style_id: str, seen=()) -> int:
+        if style_id in levels:
+            return levels[style_id]
+        parent = based_on.get(style_id)
+        if parent is None or parent in seen:
+            return 0
+        return resolve(parent, seen + (style_id,))
+
+    return {style_id: level for style_id in set(levels) | set(based_on) if (level := resolve(style_id))}
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the blocks of a .docx document in order
+
+    Blocks are dicts with a "type" of "heading" (with "level" and "text"),
+    "paragraph" (with "text") or "table_row" (with "cells"). Empty paragraphs
+    and rows are skipped. Nested tables are flattened into their parent cell.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        heading_levels = _heading_levels(archive)
+
+        with archive.open("word/document.xml") as xml_file:
+            body = None
+            paragraphs: List[List[str]] = []  # Run texts of open paragraphs (text boxes nest them)
+            cells: List[List[str]] = []  # Paragraph texts of open table cells
+            rows: List[List[str]] = []  # Cell texts of open table rows
+            table_depth = 0
+            fallback_depth = 0
+
+            for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+                tag = elem.tag
+
+                if event == "start":
+                    if tag == BODY:
+                        body = elem
+                    elif tag == FALLBACK:
+                        # Fallback content duplicates the preferred alternative
+                        fallback_depth += 1
+                    elif fallback_depth:
+                        continue
+                    elif tag == P:
+                        paragraphs.append([])
+                    elif tag == TBL:
+                        table_depth += 1
+                    elif tag == TR:
+                        rows.append([])
+                    elif tag == TC:
+                        cells.append([])
+                    continue
+
+                if tag == FALLBACK:
+                    fallback_depth -= 1
+                    continue
+                if fallback_depth:
+                    continue
+
+                if tag == T and paragraphs:
+                    paragraphs[-1].append(elem.text or "")
+                elif tag == TAB and paragraphs:
+                    paragraphs[-1].append("\t")
+                elif tag in (BR, CR) and paragraphs:
+                    paragraphs[-1].append("\n")
+
+                elif tag == P:
+                    text = "".join(paragraphs.pop()).strip()
+                    if text:
+                        if table_depth:
+                            if cells:
+                                cells[-1].append(text)
+                        else:
+                            level = _paragraph_level(elem, heading_levels)
+                            if level:
+                                yield {"type": "heading", "level": level, "text": text}
+                            else:
+                                yield {"type": "paragraph", "text": text}
+                    elem.clear()
+
+                elif tag == TC:
+                    if rows:
+                        rows[-1].append("\n".join(cells.pop()))
+                elif tag == TR:
+                    row = rows.pop()
+                    if any(cell.strip() for cell in row):
+                        if table_depth > 1 and cells:
+                            cells[-1].append(" | ".join(row))
+                        else:
+                            yield {"type": "table_row", "cells": row}
+                elif tag == TBL:
+                    table_depth -= 1
+
+                # Drop finished top-level blocks so the tree never grows
+                if body is not None and not table_depth and not paragraphs and tag in (P, TBL):
+                    body.clear()
+
+
+def _paragraph_level(paragraph: ET.Element, heading_levels: Dict[str, int]) -> int:
+    """Heading level of a paragraph (0 for body text) from direct formatting or its style"""
+    ppr = paragraph.find(_w("pPr"))
+    if ppr is None:
+        return 0
+    outline = ppr.find(OUTLINE_LVL)
+    if outline is not None:
+        level = int(outline.get(VAL, BODY_TEXT_LEVEL))
+        return level + 1 if level < BODY_TEXT_LEVEL else 0
+    style = ppr.find(PSTYLE)
+    if style is not None:
+        return heading_levels.get(style.get(VAL), 0)
+    return 0
+
+
+def blocks_to_text(blocks) -> str:
+    """
+    Render blocks as plain text for chunking
+
+    Headings and paragraphs are separated by blank lines; the rows of a table
+    are kept together, one row per line with cells separated by " | ".
+    """
+    parts: List[str] = []
+    table_rows: List[str] = []
+    for block in blocks:
+        if block["type"] == "table_row":
+            table_rows.append(" | ".join(cell.replace("\n", " ") for cell in block["cells"] if cell))
+            continue
+        if table_rows:
+            parts.append("\n".join(table_rows))
+            table_rows = []
+        parts.append(block["text"])
+    if table_rows:
+        parts.append("\n".join(table_rows))
+    return "\n\n".join(parts)
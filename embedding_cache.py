@@ -0,0 +1,109 @@
+"""
+Persistent embedding cache
+Stores embeddings as float32 blobs in SQLite, keyed by model, dimension and
+a hash of the text, with a size cap enforced by least-recently-used eviction
+(see sqlite_lru.py).
+Shared by ingestion and search so repeated texts and queries are embedded once.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import time
+from array import array
+from typing import List, Dict, Optional
+
+from sqlite_lru import SizeCappedStore
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache(SizeCappedStore):
+    """SQLite-backed embedding cache with LRU eviction"""
+
+    table = "embeddings"
+    columns = "model TEXT NOT NULL, dimension INTEGER NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL"
+    value_column = "vector"
+    entry_name = "embeddings"
+
+    def __init__(self, path, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite database file
+            max_bytes: Upper bound for the total size of stored vectors
+        """
+        super().__init__(path, max_bytes)
+
+    @staticmethod
+    def make_key(model: str, dimension: int, text: str) -> str:
+        """Cache key for a text embedded with a given model and dimension"""
+        return hashlib.sha256(f"{model}\0{dimension}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _to_blob(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _from_blob(blob: bytes) -> List[float]:
+        values = array("f")
+        values.frombytes(blob)
+        return values.tolist()
+
+    def get_many(self, model: str, dimension: int, texts: List[str]) -> Dict[int, List[float]]:
+        """Look up texts and return {position: embedding} for the cache hits"""
+        keys = [self.make_key(model, dimension, text) for text in texts]
+        found: Dict[str, List[float]] = {}
+
+        try:
+            with self._lock:
+                # Stay well below SQLite's bound-parameter limit
+                unique_keys = list(dict.fromkeys(keys))
+                for start in range(0, len(unique_keys), 500):
+                    chunk = unique_keys[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = self._from_blob(blob)
+
+                if found:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+                    self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return {}
+
+        return {i: found[key] for i, key in enumerate(keys) if key in found}
+
+    def get(self, model: str, dimension: int, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for text, or None"""
+        return self.get_many(model, dimension, [text]).get(0)
+
+    def put_many(self, model: str, dimension: int, items: Dict[str, List[float]]) -> None:
+        """Store {text: embedding} pairs and evict old entries if over the size cap"""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (self.make_key(model, dimension, text), model, dimension, self._to_blob(vector), now)
+            for text, vector in items.items()
+        ]
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, dimension, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+                self._added(sum(len(row[3]) for row in rows))
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def put(self, model: str, dimension: int, text: str, vector: List[float]) -> None:
+        """Store one embedding"""
+        self.put_many(model, dimension, {text: vector})
@@ -0,0 +1,150 @@
+"""
+Embedding backends
+DocumentRAG embeds through a small backend interface so the model can be
+swapped by configuration: OpenAI models (with native reduced dimensions where
+the model supports them) or a local hashed term-frequency model that needs no
+network and has predictable latency.
+"""
+
+import hashlib
+import logging
+import math
+import re
+from collections import Counter
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# OpenAI models that accept a "dimensions" parameter
+NATIVE_DIMENSION_MODELS = {"text-embedding-3-small", "text-embedding-3-large"}
+
+# Signature of vectors indexed before backends existed (ada-002 truncated to 1024)
+LEGACY_SIGNATURE = "openai:text-embedding-ada-002:1024"
+
+# Default OpenAI model. Existing indexes were built with it; set EMBEDDING_MODEL
+# (e.g. text-embedding-3-small) and re-ingest to move to another model
+DEFAULT_OPENAI_MODEL = "text-embedding-ada-002"
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    """Scale a vector to unit length (zero vectors are returned unchanged)"""
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0:
+        return vector
+    return [value / norm for value in vector]
+
+
+class EmbeddingBackend:
+    """Interface for embedding backends"""
+
+    # Backend name, part of the signature stored with indexed vectors
+    name = ""
+    # Whether results are worth keeping in the persistent embedding cache
+    cacheable = True
+
+    def __init__(self, model: str, dimension: int, max_input_tokens: int):
+        self.model = model
+        self.dimension = dimension
+        self.max_input_tokens = max_input_tokens
+
+    @property
+    def signature(self) -> str:
+        """Identifies the vector space; vectors with different signatures must not be mixed"""
+        return f"{self.name}:{self.model}:{self.dimension}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in one request, returning vectors in input order"""
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAI embeddings API"""
+
+    name = "openai"
+
+    def __init__(self, client, model: str = DEFAULT_OPENAI_MODEL, dimension: int = 1024,
+                 max_input_tokens: int = 8191):
+        super().__init__(model, dimension, max_input_tokens)
+        self.client = client
+        self.native_dimensions = model in NATIVE_DIMENSION_MODELS
+        if not self.native_dimensions:
+            logger.warning(f"{model} does not support reduced dimensions, "
+                           f"embeddings are truncated to {dimension} and renormalized")
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        kwargs = {"model": self.model, "input": texts}
+        if self.native_dimensions:
+            kwargs["dimensions"] = self.dimension
+        response = self.client.embeddings.create(**kwargs)
+
+        # Results carry the input position, do not rely on response order
+        vectors: List[List[float]] = [None] * len(texts)
+        for item in response.data:
+            if self.native_dimensions:
+                vectors[item.index] = item.embedding
+            else:
+                vectors[item.index] = _normalize(item.embedding[:self.dimension])
+        if any(vector is None for vector in vectors):
+            raise ValueError(f"Embeddings response has {len(response.data)} results for {len(texts)} inputs")
+        return vectors
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Local hashed term-frequency embeddings
+
+    Words and character trigrams are hashed into a fixed number of signed
+    buckets and weighted with sublinear term frequency. Runs on the CPU with no
+    model files or network access; quality is lexical rather than semantic.
+    """
+
+    name = "hashing"
+    cacheable = False  # Cheaper to recompute than to look up
+
+    _WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, dimension: int = 1024, max_input_tokens: int = 8191):
+        super().__init__("hashed-tf-v1", dimension, max_input_tokens)
+
+    def _features(self, text: str) -> Counter:
+        words = self._WORD_RE.findall(text.lower())
+        features = Counter(f"w:{word}" for word in words)
+        for word in words:
+            padded = f" {word} "
+            features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for feature, count in self._features(text).items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            # The sign bit spreads hash collisions around zero instead of piling them up
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign * (1.0 + math.log(count))
+        return _normalize(vector)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+def create_embedding_backend(backend: str, dimension: int, openai_client=None,
+                             model: str = None, max_input_tokens: int = 8191) -> EmbeddingBackend:
+    """
+    Build an embedding backend by name
+
+    Args:
+        backend: "openai" or "local"
+        dimension: Vector dimension, must match the index
+        openai_client: OpenAI client, required for the openai backend
+        model: OpenAI model name (defaults to DEFAULT_OPENAI_MODEL)
+        max_input_tokens: Longest input the backend accepts
+    """
+    backend = (backend or "openai").lower()
+    if backend == "openai":
+        if openai_client is None:
+            raise ValueError("The openai embedding backend needs an OpenAI client")
+        return OpenAIEmbeddingBackend(openai_client, model or DEFAULT_OPENAI_MODEL, dimension, max_input_tokens)
+    if backend in ("local", "hashing"):
+        return HashingEmbeddingBackend(dimension, max_input_tokens)
+    raise ValueError(f"Unknown embedding backend: {backend}")
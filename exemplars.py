@@ -0,0 +1,214 @@
+"""
+Exemplar answers from prior applications
+Splits the "Ansökan om stöd" application forms in docs/ by their question
+headings and turns each answer into its own retrievable unit, linked to the
+matching question in form_structure. Personal and account details (applicant,
+partner, payment and contact sections) are deliberately not indexed.
+"""
+
+import logging
+import os
+import re
+from typing import List, Dict, Any, Optional, Tuple
+
+from formstructure import form_structure
+from docx_extract import iter_docx_blocks
+from text_utils import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Namespace holding the answers of all prior applications
+EXEMPLAR_NAMESPACE = "exemplar_answers"
+
+# Swedish question heading (prefix) -> (form_structure section, English question prefix)
+SWEDISH_QUESTIONS: List[Tuple[str, str, str]] = [
+    ("Projektnamn", "Overview", "Project name"),
+    ("Projektstart", "Overview", "Project start date"),
+    ("Projektslut", "Overview", "Project end date"),
+    ("I vilken eller vilka kommuner kommer insatserna genomföras?", "Overview", "In which municipality"),
+    ("Söker ni finansiering för en förstudie?", "Overview", "Are you looking for funding for a feasibility study?"),
+    ("Söker ni finansiering för ett ramprojekt?", "Overview", "Are you looking for financing for a framework project?"),
+    ("Har projektet genomfört den hållbarhetsanalys", "Overview", "Has the project carried out the sustainability analysis"),
+    ("Söker ni finansiering för att investera i infrastruktur?", "Overview", "Are you applying for financing to invest in infrastructure?"),
+    ("Sammanfatta projektet", "Overview", "Summarize the project"),
+    ("Beskriv kortfattat ert projektmål", "Challenges and Needs", "Briefly describe your project goal"),
+    ("Vilken utmaning i utlysningen", "Challenges and Needs", "Which challenge in the call for proposals"),
+    ("Beskriv nuläget", "Challenges and Needs", "Describe the current situation"),
+    ("Vilka av de globala målen i Agenda 2030", "Challenges and Needs", "Which of the global goals in Agenda 2030"),
+    ("Motivera valet av Agenda 2030 mål", "Challenges and Needs", "Justify the choice of Agenda 2030 goals"),
+    ("Välj en primär målgrupp", "Target Group", "Select a primary target group"),
+    ("Välj eventuellt en eller flera sekundära målgrupper", "Target Group", "Optionally, select one or more secondary target groups"),
+    ("Beskriv projektets målgrupp och deras behov", "Target Group", "Describe the project's target group and their needs"),
+    ("Vad har ni för tidigare erfarenhet av målgruppen", "Target Group", "What is your previous experience with the target group"),
+    ("Hur har ni arbetat för att inkludera målgruppen i förberedelserna", "Target Group", "How have you worked to include the target group"),
+    ("Hur ska ni arbeta för att inkludera målgruppen i genomförandet", "Target Group", "How will you work to include the target group"),
+    ("Vilken huvudsaklig bransch", "Target Group", "Which main industry"),
+    ("På vilket sätt kommer era arbetspaket att påverka de globala målen", "Target Group", "In what way will your work packages impact the global goals"),
+    ("Var ska resultaten uppstå", "Expected Results", "Where will the results arise"),
+    ("Förmåga - vad kommer målgruppen", "Expected Results", "Capacity/Ability"),
+    ("Vilka förändrade beteenden", "Expected Results", "What changed behaviors"),
+    ("Hur kommer projektets organisation vara uppbyggd", "Organization", "How will the project's organization be structured"),
+    ("Vilka andra liknande projekt", "Organization", "What other similar projects"),
+    ("Hur ska ni internt i projektorganisationen arbeta för en inkluderande kultur", "Organization", "How will you internally in the project organization"),
+    ("Beskriv vilken kompetens i hållbarhet", "Organization", "Describe what sustainability expertise"),
+    ("Kommer ni i ert projekts genomförande att arbeta med andra aktörer", "Organization", "Will you, in the implementation of your project"),
+    ("Beskriv vad för slags arbete som kommer att genomföras", "Organization", "Describe what kind of work will be carried out"),
+    ("Söker ni stöd för aktiviteter som bidrar till genomförandet av Östersjöstrategin", "Organization", "Are you seeking support for activities that contribute to the implementation of the Baltic Sea Strategy"),
+    ("Hur har ni i projektets planering säkerställt att ni har förmåga att rapportera", "Working Method", "How have you ensured in the project planning"),
+    ("Hur ska ni arbeta med kommunikation", "Working Method", "How are you going to work with communication"),
+    ("Som projektägare har vi förstått att vi måste samla in könsuppdelad statistik", "Working Method", "Do you have a documented routine for the collection and reporting of gender-disaggregated statistics"),
+    ("Hur ska ni arbeta med inköp", "Working Method", "How will you work with procurement"),
+    ("Hur har ni säkerställt projektets medfinansiering", "Working Method", "How have you ensured the project's co-financing"),
+    ("Vad för risker har ni identifierat", "Working Method", "What risks have you identified"),
+    ("Beskriv utifrån era gällande riktlinjer", "Working Method", "Describe, based on your current guidelines"),
+    ("Beskriv hur ni kommer att arbeta med att dokumentera, sprida", "Working Method", "Describe how you will work to document, disseminate"),
+]
+
+# Level 2 sections whose tables hold one answer per row
+TIME_PLAN_HEADING = "Tid och aktivitetsplan"
+INDICATORS_HEADING = "Indikatorer"
+
+# Work package rows are numbered "1 - ...", their activities "1.1 - ..."
+_WORK_PACKAGE_RE = re.compile(r"^\d+\s*-")
+_ACTIVITY_RE = re.compile(r"^\d+\.\d+\s*-")
+
+# Answers longer than this are split into several units
+MAX_UNIT_TOKENS = 1000
+
+
+def resolve_form_question(section: str, prefix: str) -> Optional[str]:
+    """Full form_structure question text in a section that starts with prefix"""
+    for field in form_structure.get(section, []):
+        question = field.get("question")
+        if question and question.startswith(prefix):
+            return question
+    return None
+
+
+def _match_question(heading: str) -> Optional[Tuple[str, str]]:
+    """(section, English question) for a Swedish question heading, if it is indexed"""
+    for swedish, section, english in SWEDISH_QUESTIONS:
+        if heading.startswith(swedish):
+            question = resolve_form_question(section, english)
+            if question:
+                return section, question
+            logger.warning(f"No form_structure question in {section} starting with '{english}'")
+            return None
+    return None
+
+
+def _answer_units(question_sv: str, answer: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Build units for one answer, splitting answers that are too long to embed well"""
+    from chunking import chunk_text
+
+    parts = [answer]
+    if count_tokens(answer) > MAX_UNIT_TOKENS:
+        parts = chunk_text(answer, MAX_UNIT_TOKENS, 0)
+    return [
+        {
+            "text": f"{question_sv}\n\n{part}",
+            "metadata": dict(metadata, part=i, total_parts=len(parts)),
+        }
+        for i, part in enumerate(parts)
+    ]
+
+
+def extract_answer_units(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Split an application form into answer units
+
+    Returns:
+        List of {"text", "metadata"} dicts; metadata links each unit to its
+        application and to the matching form_structure section and question.
+    """
+    filename = os.path.basename(file_path)
+    application_id = "".join(re.findall(r"\d+", filename))
+    units: List[Dict[str, Any]] = []
+
+    current: Optional[Dict[str, Any]] = None  # Open question: heading, match, answer lines
+    section_table: Optional[str] = None  # Level 2 table section being read
+    project_name = ""
+
+    def close_question():
+        nonlocal project_name
+        if current and current["answer"]:
+            answer = "\n".join(current["answer"]).strip()
+            if current["form_section"] == "Overview" and current["form_question"] == "Project name":
+                project_name = answer
+            units.extend(_answer_units(current["question_sv"], answer, {
+                "form_section": current["form_section"],
+                "form_question": current["form_question"],
+                "question_sv": current["question_sv"],
+            }))
+
+    for block in iter_docx_blocks(file_path):
+        if block["type"] == "heading":
+            close_question()
+            current = None
+            section_table = None
+            if block["level"] <= 2:
+                if block["text"] in (TIME_PLAN_HEADING, INDICATORS_HEADING):
+                    section_table = block["text"]
+                continue
+            match = _match_question(block["text"])
+            if match:
+                current = {
+                    "question_sv": block["text"],
+                    "form_section": match[0],
+                    "form_question": match[1],
+                    "answer": [],
+                }
+            continue
+
+        if current is not None:
+            if block["type"] == "table_row":
+                current["answer"].append(" | ".join(cell for cell in block["cells"] if cell))
+            else:
+                current["answer"].append(block["text"])
+            continue
+
+        if section_table and block["type"] == "table_row":
+            cells = [cell for cell in block["cells"] if cell.strip()]
+            if len(cells) < 2:
+                continue
+            name = cells[0].strip()
+            if section_table == TIME_PLAN_HEADING:
+                if _ACTIVITY_RE.match(name):
+                    target = ("Activities", "Description of activity")
+                elif _WORK_PACKAGE_RE.match(name):
+                    target = ("Activities", "Description how the work package contributes to the project goal")
+                else:
+                    continue  # Header row
+            else:
+                target = ("Expected Results", "Target Value")
+            units.extend(_answer_units(name, "\n".join(cells[1:]), {
+                "form_section": target[0],
+                "form_question": resolve_form_question(*target) or target[1],
+                "question_sv": section_table,
+            }))
+
+    close_question()
+
+    for unit in units:
+        unit["metadata"].update({
+            "application_id": application_id,
+            "project_name": project_name,
+            "unit_type": "exemplar_answer",
+        })
+    return units
+
+
+def extract_exemplar_units(file_path: str, chunk_size: int = None, overlap: int = None) -> Dict[str, Any]:
+    """Ingestion pipeline extractor for application forms (runs in a worker process)"""
+    try:
+        units = extract_answer_units(file_path)
+        if not units:
+            return {"file_path": file_path, "chunks": [], "metadata": [], "error": "No answers found"}
+        return {
+            "file_path": file_path,
+            "chunks": [unit["text"] for unit in units],
+            "metadata": [unit["metadata"] for unit in units],
+            "error": None,
+        }
+    except Exception as e:
+        return {"file_path": file_path, "chunks": [], "metadata": [], "error": str(e)}
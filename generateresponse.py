@@ -1,15 +1,77 @@
 import streamlit as st
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, create_model
+from typing import Any, Callable, List, Optional
 from enum import Enum
+import asyncio
 import json
+import logging
+import threading
+
+from context_assembler import assemble_context, collect_facts
+from llm_cache import LLMResponseCache
+from partial_json import PartialObjectParser
+from settings import get_setting
+
+logger = logging.getLogger(__name__)
 
 client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
 
 
+def get_async_client() -> AsyncOpenAI:
+    """
+    New async OpenAI client
+    
+    Async clients are bound to the event loop they are used on, so each
+    asyncio.run() gets its own client (see step_orchestrator.py).
+    """
+    return AsyncOpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide LLM response cache, or None if it cannot be opened"""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            try:
+                _llm_cache = LLMResponseCache(
+                    get_setting("LLM_CACHE_PATH", "rag_store/llm_cache.sqlite"),
+                    max_bytes=int(get_setting("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+                )
+            except Exception as e:
+                logger.error(f"Could not open LLM response cache: {e}")
+                return None
+        return _llm_cache
+
+
+def _cache_key(name: str, user_input, context: str, request: dict) -> str:
+    system_prompt = "\n".join(message["content"] for message in request["messages"] if message["role"] == "system")
+    return LLMResponseCache.make_key(
+        name, user_input, context, request["model"], request["response_format"], request["temperature"],
+        system_prompt=system_prompt, max_tokens=request.get("max_tokens")
+    )
+
+
+def _cached_response(key: str, request: dict, force: bool = False):
+    """Cached parsed response for a request, unless force is set"""
+    cache = get_llm_cache()
+    if force or cache is None:
+        return None
+    return cache.get(key, request["response_format"])
+
+
+def _cache_response(key: str, name: str, request: dict, parsed) -> None:
+    cache = get_llm_cache()
+    if cache is not None and isinstance(parsed, BaseModel):
+        cache.put(key, name, request["model"], parsed)
+
+
 # Step 1 - Organisation & contact
 class AIOrganisationContact(BaseModel):
     applicant_legal_name: str
@@ -195,139 +257,280 @@ class DashboardData(BaseModel):
     cost_breakdown: str = Field(default="", description="Cost breakdown and analysis")
 
 
-def generate_from_ai(step_name: str, user_input: dict, context: str = ""):
+STEP_MODEL_MAP = {
+    "1 - Organisation & contact": AIOrganisationContact,
+    "2 - Project idea": AIProjectIdea,
+    "3 - Programme & geography": AIProgrammeGeography,
+    "4 - Target group": AITargetGroup,
+    "5 - Agenda 2030 & risk": AIAgenda2030Risk,
+    "6 - Work-package generator & Policies": AIWorkPackageGeneratorAndPolicies,  # Updated for merged step
+}
+
+
+def _step_request(step_name: str, user_input: dict, context: str = "") -> dict:
+    """Structured-output request arguments for a wizard step"""
+    # Prepare the prompt with context if available
+    user_prompt = f"User input for step '{step_name}':\n{str(user_input)}"
+    
+    if context and context.strip():
+        user_prompt += f"\n\nRelevant context from classification documents:\n{context}"
+        user_prompt += "\n\nPlease use the provided context to inform your response and ensure consistency with the document requirements."
+    
+    return {
+        "model": "gpt-4o-2024-08-06",
+        "messages": [
+            {
+                "role": "system",
+                "content": "You are a helpful assistant writing structured ERDF application sections. Use any provided context from classification documents to ensure your response aligns with the required format and standards.",
+            },
+            {
+                "role": "user",
+                "content": user_prompt,
+            },
+        ],
+        "response_format": STEP_MODEL_MAP[step_name],
+        "temperature": 0.6,
+        "max_tokens": 1000,
+    }
+
+
+def generate_from_ai(step_name: str, user_input: dict, context: str = "", force: bool = False):
     """
     Generate AI response for wizard step with optional RAG context.
     
+    Responses are cached; an unchanged step returns the cached response.
+    
     Args:
         step_name: Name of the wizard step
         user_input: User's input data for the step (dictionary)
         context: Optional context retrieved from classification documents
+        force: Regenerate even if a cached response exists
     
     Returns:
         Structured AI response based on step requirements
     """
-    step_model_map = {
-        "1 - Organisation & contact": AIOrganisationContact,
-        "2 - Project idea": AIProjectIdea,
-        "3 - Programme & geography": AIProgrammeGeography,
-        "4 - Target group": AITargetGroup,
-        "5 - Agenda 2030 & risk": AIAgenda2030Risk,
-        "6 - Work-package generator & Policies": AIWorkPackageGeneratorAndPolicies,  # Updated for merged step
-    }
-
-    model_class = step_model_map.get(step_name)
-    if model_class is None:
+    if step_name not in STEP_MODEL_MAP:
         return f"❌ Error: Unknown step '{step_name}'"
 
     try:
-        # Prepare the prompt with context if available
-        user_prompt = f"User input for step '{step_name}':\n{str(user_input)}"
-        
-        if context and context.strip():
-            user_prompt += f"\n\nRelevant context from classification documents:\n{context}"
-            user_prompt += "\n\nPlease use the provided context to inform your response and ensure consistency with the document requirements."
-        
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant writing structured ERDF application sections. Use any provided context from classification documents to ensure your response aligns with the required format and standards.",
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt,
-                },
-            ],
-            response_format=model_class,
-            temperature=0.6,
-            max_tokens=1000,
-        )
+        request = _step_request(step_name, user_input, context)
+        key = _cache_key(step_name, user_input, context, request)
+        cached = _cached_response(key, request, force)
+        if cached is not None:
+            return cached
         
-        return response.choices[0].message.parsed  # returns a structured Pydantic object
+        response = client.beta.chat.completions.parse(**request)
+        parsed = response.choices[0].message.parsed
+        _cache_response(key, step_name, request, parsed)
+        return parsed  # returns a structured Pydantic object
     except Exception as e:
         return f"❌ Error during AI generation: {e}"
 
 
-def generate_dashboard_data(all_wizard_data: dict, all_contexts=None) -> DashboardData:
+async def agenerate_from_ai(async_client: AsyncOpenAI, step_name: str, user_input: dict, context: str = "",
+                            force: bool = False):
     """
-    Generate comprehensive dashboard data from all wizard steps.
+    Async version of generate_from_ai, so several steps can be generated concurrently.
     
     Args:
-        all_wizard_data: Complete data from all wizard steps
-        all_contexts: RAG contexts from each step (optional)
+        async_client: AsyncOpenAI client (see get_async_client)
+        step_name: Name of the wizard step
+        user_input: User's input data for the step (dictionary)
+        context: Optional context retrieved from classification documents
+        force: Regenerate even if a cached response exists
     
     Returns:
-        DashboardData: Structured data for dashboard auto-fill
+        Structured AI response based on step requirements
     """
+    if step_name not in STEP_MODEL_MAP:
+        return f"❌ Error: Unknown step '{step_name}'"
+
     try:
-        # Combine all wizard data and contexts
-        combined_input = f"Complete project data from wizard:\n{str(all_wizard_data)}"
+        request = _step_request(step_name, user_input, context)
+        key = _cache_key(step_name, user_input, context, request)
+        cached = _cached_response(key, request, force)
+        if cached is not None:
+            return cached
+        
+        response = await async_client.beta.chat.completions.parse(**request)
+        parsed = response.choices[0].message.parsed
+        _cache_response(key, step_name, request, parsed)
+        return parsed  # returns a structured Pydantic object
+    except Exception as e:
+        return f"❌ Error during AI generation: {e}"
+
+
+def default_dashboard_data() -> DashboardData:
+    """Professional placeholder content, used for any section whose generation fails"""
+    return DashboardData(
+        # Overview
+        project_overview="Professional ERDF project for regional development",
+        support_scheme_description="This project seeks support under the European Regional Development Fund (ERDF) framework, specifically designed to promote smart and sustainable growth in the region. The ERDF aims to strengthen economic, social and territorial cohesion by correcting imbalances between regions.",
+        project_summary="This comprehensive regional development project aims to address key challenges in the region through innovative approaches and sustainable solutions. The project aligns with EU strategic objectives and regional development priorities.",
+        project_objectives="The project aims to achieve measurable improvements in regional competitiveness and sustainability through targeted interventions and stakeholder engagement.",
+        expected_outcomes="Expected outcomes include enhanced regional capacity, improved stakeholder collaboration, and measurable progress toward sustainability goals.",
         
-        if all_contexts:
-            combined_input += f"\n\nRelevant contexts from classification documents:\n{str(all_contexts)}"
-            combined_input += "\n\nPlease use the provided contexts to ensure consistency with ERDF requirements."
+        # Project Owner
+        legal_code_form="Aktiebolag (AB)",
+        industry_code_name="NACE Code 84.11 - General public administration activities",
+        country="Sweden",
+        vat_registration_number="SE556789123401",
+        bank_account_number="Swedbank: 8000-9 123 456 789-0",
+        organization_description="Established regional organization with extensive experience in project management and stakeholder engagement.",
+        organization_capacity="The organization has demonstrated capacity to manage complex EU-funded projects with proven track record in regional development.",
+        main_contact_info="Primary contact established with relevant expertise and authority to represent the organization.",
         
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": """You are an expert ERDF application writer. Based on the complete wizard data, generate comprehensive and professional content for ALL dashboard fields. 
+        # Project Partner (defaults)
+        partner_org_number="556123-4567",
+        partner_name="Regional Development Partner AB",
+        partner_post_code="123 45",
+        partner_visiting_address="Utvecklingsgatan 12",
+        partner_city="Stockholm",
+        partner_industry_code="NACE 84.12",
+        partner_vat_number="SE556123456701",
+        
+        # All other fields with professional defaults
+        current_situation="The current regional situation presents challenges that require targeted intervention and coordinated action.",
+        identified_challenges="Key challenges have been identified through stakeholder consultation and regional analysis.",
+        needs_analysis="Comprehensive needs analysis has been conducted to inform project design and implementation strategy.",
+        agenda_2030_justification="The project contributes to multiple SDG goals through targeted interventions and measurable outcomes.",
+        target_group_description="The target group consists of key regional stakeholders who will benefit from project interventions.",
+        beneficiary_analysis="Beneficiaries have been identified through comprehensive stakeholder mapping and needs assessment.",
+        stakeholder_engagement="Stakeholder engagement strategy ensures inclusive participation throughout project lifecycle.",
+        target_group_global_goals_impact="Work packages are designed to contribute to global sustainability goals while managing potential conflicts through coordinated planning.",
+        activity_summary="Project activities are structured to achieve maximum impact through coordinated implementation.",
+        implementation_plan="Implementation follows established project management principles with clear milestones and deliverables.",
+        work_package_name="WP1: Regional Analysis, WP2: Stakeholder Engagement, WP3: Implementation, WP4: Evaluation",
+        activity_name="Stakeholder workshops, capacity building, monitoring and evaluation",
+        work_package_global_goals_impact="All work packages contribute to global sustainability goals through targeted interventions.",
+        expected_results="The project will deliver measurable results aligned with regional development objectives.",
+        impact_indicators="Impact will be measured through established indicators and regular monitoring.",
+        results_location="Results will arise primarily in the target region with potential for broader application.",
+        capacity_ability_gains="Target groups will gain enhanced capacity and access to improved services and opportunities.",
+        behavioral_changes="Strengthened capabilities are expected to lead to more sustainable practices and improved collaboration.",
+        target_value="Specific target values will be established based on baseline measurements and regional priorities.",
+        results_remarks="Results will be documented and disseminated to ensure broader learning and application.",
+        success_measures="Success will be measured through quantitative and qualitative indicators aligned with project objectives.",
+        organizational_structure="Project organization follows established governance structures with clear roles and responsibilities.",
+        management_capacity="Management capacity has been demonstrated through previous project experience and organizational expertise.",
+        project_organization_structure="The project will be structured with clear governance, management, and implementation layers.",
+        similar_projects_awareness="The organization is aware of similar initiatives and will coordinate to ensure complementarity.",
+        inclusive_culture_approach="The project will implement inclusive practices to ensure equal opportunities for all participants.",
+        sustainability_expertise="Sustainability expertise exists within the organization and will be further strengthened as needed.",
+        external_collaboration="The project will collaborate with external actors to maximize impact and ensure sustainability.",
+        collaboration_description="Collaboration will involve knowledge sharing, resource coordination, and joint implementation activities.",
+        baltic_sea_strategy="The project aligns with Baltic Sea Strategy objectives where applicable.",
+        baltic_sea_contribution="Contribution to Baltic Sea Strategy goals will be achieved through coordinated regional action.",
+        methodology="The project employs established methodologies adapted to regional context and requirements.",
+        project_management="Project management follows international standards with appropriate governance structures.",
+        quality_assurance="Quality assurance measures ensure project deliverables meet established standards.",
+        reporting_capability="Reporting capability has been established through appropriate systems and procedures.",
+        communication_approach="Communication strategy ensures effective information sharing among all stakeholders.",
+        gender_statistics_routine="Gender-disaggregated statistics will be collected and reported according to established procedures.",
+        gender_reporting_commitment="The organization commits to reporting gender distribution as required by funding guidelines.",
+        procurement_approach="Procurement will follow applicable regulations ensuring transparency and value for money.",
+        co_financing_management="Co-financing and liquidity management systems are in place to ensure project sustainability.",
+        risk_identification_measures="Comprehensive risk management includes identification, assessment, and mitigation measures.",
+        guidelines_compliance="The project will comply with all applicable guidelines and regulatory requirements.",
+        results_documentation_utilization="Results will be documented and utilized through established dissemination and learning strategies.",
+        budget_overview="Total project budget reflects realistic cost estimates aligned with project objectives and activities.",
+        financial_plan="Financial planning ensures sustainable funding throughout project lifecycle.",
+        cost_breakdown="Cost breakdown provides transparent allocation of resources across project components."
+    )
+
+
+DASHBOARD_SYSTEM_PROMPT = """You are an expert ERDF application writer. Based on the wizard data, generate comprehensive and professional content for ALL fields of the {section} section of the application dashboard.
 
 Generate detailed, professional content for EVERY field including:
 
-OVERVIEW SECTION:
-- support_scheme_description: Detailed description of ERDF support scheme framework
-- project_summary: Comprehensive 2-3 paragraph project summary
+{instructions}
+
+Each field should be professional, detailed (2-3 paragraphs minimum for longer fields), and aligned with ERDF funding requirements."""
 
-PROJECT OWNER SECTION:
-- legal_code_form: Legal organizational form (e.g., "Aktiebolag (AB)")
+# Dashboard sections generated by separate, concurrent calls: the fields each one
+# fills, the wizard steps whose data and context it is given, and its field instructions
+_STEPS = list(STEP_MODEL_MAP)
+DASHBOARD_SECTIONS = {
+    "Overview": {
+        "fields": ["project_overview", "support_scheme_description", "project_summary",
+                   "project_objectives", "expected_outcomes"],
+        "steps": _STEPS,
+        "instructions": """- support_scheme_description: Detailed description of ERDF support scheme framework
+- project_summary: Comprehensive 2-3 paragraph project summary""",
+    },
+    "Project Owner": {
+        "fields": ["legal_code_form", "industry_code_name", "country", "vat_registration_number",
+                   "bank_account_number", "organization_description", "organization_capacity", "main_contact_info"],
+        "steps": _STEPS[0:1],
+        "instructions": """- legal_code_form: Legal organizational form (e.g., "Aktiebolag (AB)")
 - industry_code_name: NACE industry code and description
 - country: Organization country (default "Sweden")
 - vat_registration_number: Swedish VAT number format if applicable
-- bank_account_number: Professional bank account format
-
-PROJECT PARTNER SECTION (if applicable):
-- partner_org_number: Partner organization registration number
+- bank_account_number: Professional bank account format""",
+    },
+    "Project Partner": {
+        "fields": ["partner_org_number", "partner_name", "partner_post_code", "partner_visiting_address",
+                   "partner_city", "partner_industry_code", "partner_vat_number", "partner_details", "partner_roles"],
+        "steps": _STEPS[0:1],
+        "instructions": """- partner_org_number: Partner organization registration number
 - partner_name: Key project partner name
 - partner_post_code: Partner postal code
-- partner_visiting_address: Partner street address  
+- partner_visiting_address: Partner street address
 - partner_city: Partner city
 - partner_industry_code: Partner industry classification
-- partner_vat_number: Partner VAT number if applicable
-
-CHALLENGES AND NEEDS:
-- agenda_2030_justification: Detailed justification for chosen SDG goals
-
-TARGET GROUP:
-- target_group_global_goals_impact: Explain work package impacts on global goals and goal conflict management
-
-ACTIVITIES:
-- work_package_name: Specific work package names
+- partner_vat_number: Partner VAT number if applicable""",
+    },
+    "Challenges and Needs": {
+        "fields": ["current_situation", "identified_challenges", "needs_analysis", "agenda_2030_justification"],
+        "steps": [_STEPS[1], _STEPS[2], _STEPS[4]],
+        "instructions": """- agenda_2030_justification: Detailed justification for chosen SDG goals""",
+    },
+    "Target Group": {
+        "fields": ["target_group_description", "beneficiary_analysis", "stakeholder_engagement",
+                   "target_group_global_goals_impact"],
+        "steps": [_STEPS[3], _STEPS[4], _STEPS[5]],
+        "instructions": """- target_group_global_goals_impact: Explain work package impacts on global goals and goal conflict management""",
+    },
+    "Activities": {
+        "fields": ["activity_summary", "implementation_plan", "work_package_name", "activity_name",
+                   "work_package_global_goals_impact"],
+        "steps": [_STEPS[1], _STEPS[4], _STEPS[5]],
+        "instructions": """- work_package_name: Specific work package names
 - activity_name: Specific activity names
-- work_package_global_goals_impact: Impact on global goals
-
-EXPECTED RESULTS:
-- results_location: Where results will arise
+- work_package_global_goals_impact: Impact on global goals""",
+    },
+    "Expected Results": {
+        "fields": ["expected_results", "impact_indicators", "results_location", "capacity_ability_gains",
+                   "behavioral_changes", "target_value", "results_remarks", "success_measures"],
+        "steps": [_STEPS[1], _STEPS[2], _STEPS[3], _STEPS[5]],
+        "instructions": """- results_location: Where results will arise
 - capacity_ability_gains: What target group will gain access to
 - behavioral_changes: Expected behavioral changes
 - target_value: Specific target values and metrics
-- results_remarks: Additional remarks
-
-ORGANISATION:
-- project_organization_structure: How project organization will be structured
+- results_remarks: Additional remarks""",
+    },
+    "Organisation": {
+        "fields": ["organizational_structure", "management_capacity", "project_organization_structure",
+                   "similar_projects_awareness", "inclusive_culture_approach", "sustainability_expertise",
+                   "external_collaboration", "collaboration_description", "baltic_sea_strategy",
+                   "baltic_sea_contribution"],
+        "steps": [_STEPS[0], _STEPS[2], _STEPS[5]],
+        "instructions": """- project_organization_structure: How project organization will be structured
 - similar_projects_awareness: Awareness of similar projects
 - inclusive_culture_approach: Approach to inclusive culture
 - sustainability_expertise: Sustainability expertise description
 - external_collaboration: Collaboration with external actors
 - collaboration_description: Description of collaboration work
 - baltic_sea_strategy: Baltic Sea Strategy involvement
-- baltic_sea_contribution: Contribution to Baltic Sea Strategy goals
-
-WORKING METHOD:
-- reporting_capability: Capability to report costs and activities
+- baltic_sea_contribution: Contribution to Baltic Sea Strategy goals""",
+    },
+    "Working Method": {
+        "fields": ["methodology", "project_management", "quality_assurance", "reporting_capability",
+                   "communication_approach", "gender_statistics_routine", "gender_reporting_commitment",
+                   "procurement_approach", "co_financing_management", "risk_identification_measures",
+                   "guidelines_compliance", "results_documentation_utilization"],
+        "steps": [_STEPS[0], _STEPS[4], _STEPS[5]],
+        "instructions": """- reporting_capability: Capability to report costs and activities
 - communication_approach: Communication strategy
 - gender_statistics_routine: Gender statistics collection routine
 - gender_reporting_commitment: Gender distribution reporting commitment
@@ -335,99 +538,201 @@ WORKING METHOD:
 - co_financing_management: Co-financing and liquidity management
 - risk_identification_measures: Risk identification and mitigation measures
 - guidelines_compliance: Compliance with current guidelines
-- results_documentation_utilization: Results documentation and utilization strategy
-
-Each field should be professional, detailed (2-3 paragraphs minimum for longer fields), and aligned with ERDF funding requirements."""
-                },
-                {
-                    "role": "user",
-                    "content": combined_input
-                }
-            ],
-            response_format=DashboardData,
-            temperature=0.5,
-            max_tokens=4000,  # Increased for comprehensive content
-        )
-        
-        return response.choices[0].message.parsed or DashboardData()
-        
+- results_documentation_utilization: Results documentation and utilization strategy""",
+    },
+    "Budget": {
+        "fields": ["budget_overview", "financial_plan", "cost_breakdown"],
+        "steps": [_STEPS[1], _STEPS[5]],
+        "instructions": """- budget_overview: Total project cost and budget breakdown
+- financial_plan: Detailed financial plan
+- cost_breakdown: Cost breakdown and analysis""",
+    },
+}
+
+# Output limit per section call; each section is a fraction of the former single 4000-token call
+DASHBOARD_SECTION_MAX_TOKENS = 2000
+
+
+# Token budget for the wizard data and document context in each section's prompt
+DASHBOARD_SECTION_CONTEXT_TOKENS = 3000
+
+# Structured-output model per section, built from the DashboardData fields
+DASHBOARD_SECTION_MODELS = {
+    section: create_model(
+        "Dashboard" + section.replace(" ", ""),
+        **{name: (DashboardData.model_fields[name].annotation, DashboardData.model_fields[name])
+           for name in spec["fields"]}
+    )
+    for section, spec in DASHBOARD_SECTIONS.items()
+}
+
+
+def _section_input(all_wizard_data: dict, all_contexts, section: str) -> str:
+    """
+    Wizard data and document context of a section's steps, for its prompt
+    
+    Facts are ranked by relevance to the section's fields: user input and
+    edits first, then generated responses, then document context, each
+    included once and within DASHBOARD_SECTION_CONTEXT_TOKENS.
+    """
+    spec = DASHBOARD_SECTIONS[section]
+    steps = [label for label in _STEPS if label in spec["steps"]]
+    user_inputs = all_wizard_data.get("user_inputs") or {}
+    generated = all_wizard_data.get("generated_responses") or {}
+    edited = all_wizard_data.get("edited_sections") or {}
+    step_contexts = all_wizard_data.get("step_contexts") or {}
+    
+    facts = []
+    for label in steps:
+        if label in user_inputs:
+            facts.extend(collect_facts(f"{label} (User Input)", user_inputs[label], priority=2.0))
+        if label in generated:
+            facts.extend(collect_facts(f"{label} (Generated Response)", generated[label], priority=1.0))
+    # Edited sections hold the generated responses until the user changes them
+    generated_values = list(generated.values())
+    for name, value in edited.items():
+        if value not in generated_values:
+            facts.extend(collect_facts(f"{name} (Edited)", value, priority=2.0))
+    for key, value in all_wizard_data.items():
+        if key not in ("user_inputs", "generated_responses", "edited_sections", "step_contexts"):
+            facts.extend(collect_facts(str(key), value, priority=1.0))
+    for label in steps:
+        # Document context only; progressive contexts repeat the previous responses
+        document_context = (step_contexts.get(label) or {}).get("document_context") or (all_contexts or {}).get(label)
+        if document_context:
+            facts.extend(collect_facts(f"{label} (Classification Documents)", document_context))
+    
+    query = " ".join([section, spec["instructions"], *spec["fields"]])
+    section_input = "Project data from wizard and relevant contexts from classification documents:\n"
+    section_input += assemble_context(facts, query, DASHBOARD_SECTION_CONTEXT_TOKENS)
+    section_input += "\n\nPlease use the provided contexts to ensure consistency with ERDF requirements."
+    return section_input
+
+
+async def _agenerate_dashboard_section(async_client, section: str, all_wizard_data: dict, all_contexts,
+                                       on_field: Optional[Callable[[str, Any], None]] = None, force: bool = False):
+    spec = DASHBOARD_SECTIONS[section]
+    section_input = _section_input(all_wizard_data, all_contexts, section)
+    request = dict(
+        model="gpt-4o-2024-08-06",
+        messages=[
+            {
+                "role": "system",
+                "content": DASHBOARD_SYSTEM_PROMPT.format(section=section.upper(), instructions=spec["instructions"])
+            },
+            {
+                "role": "user",
+                "content": section_input
+            }
+        ],
+        response_format=DASHBOARD_SECTION_MODELS[section],
+        temperature=0.5,
+        max_tokens=DASHBOARD_SECTION_MAX_TOKENS,
+    )
+    cache_name = f"dashboard:{section}"
+    # The section input already holds the step contexts
+    key = _cache_key(cache_name, section_input, "", request)
+    cached = _cached_response(key, request, force)
+    if cached is not None:
+        if on_field is not None:
+            for name, value in cached.model_dump().items():
+                on_field(name, value)
+        return cached
+    
+    if on_field is None:
+        response = await async_client.beta.chat.completions.parse(**request)
+        parsed = response.choices[0].message.parsed
+        _cache_response(key, cache_name, request, parsed)
+        return parsed
+
+    # Stream the structured output and publish each field as soon as its value is complete
+    parser = PartialObjectParser()
+    async with async_client.beta.chat.completions.stream(**request) as stream:
+        async for event in stream:
+            if event.type == "content.delta":
+                for name, value in parser.feed(event.delta):
+                    on_field(name, value)
+        response = await stream.get_final_completion()
+    parsed = response.choices[0].message.parsed
+    _cache_response(key, cache_name, request, parsed)
+    return parsed
+
+
+async def agenerate_dashboard_data(async_client, all_wizard_data: dict, all_contexts=None,
+                                   on_field: Optional[Callable[[str, Any], None]] = None,
+                                   force: bool = False) -> DashboardData:
+    """
+    Generate dashboard data with one concurrent call per section.
+    
+    Each section gets only the wizard steps and contexts it needs. A section
+    whose call fails (or is truncated) falls back to the default content
+    for that section only.
+    
+    Args:
+        async_client: AsyncOpenAI client (see get_async_client)
+        all_wizard_data: Complete data from all wizard steps
+        all_contexts: RAG contexts from each step (optional)
+        on_field: Called with (field name, value) as each field is complete;
+            streams the responses when given
+        force: Regenerate sections even if cached responses exist
+    
+    Returns:
+        DashboardData: Structured data for dashboard auto-fill
+    """
+    sections = list(DASHBOARD_SECTIONS)
+    outcomes = await asyncio.gather(
+        *(_agenerate_dashboard_section(async_client, section, all_wizard_data, all_contexts, on_field, force)
+          for section in sections),
+        return_exceptions=True
+    )
+    
+    fields = {}
+    defaults = None
+    for section, outcome in zip(sections, outcomes):
+        if isinstance(outcome, BaseModel):
+            fields.update(outcome.model_dump())
+            continue
+        logger.error(f"Dashboard section {section} failed, using default content: {outcome}")
+        defaults = defaults or default_dashboard_data()
+        section_defaults = {name: getattr(defaults, name) for name in DASHBOARD_SECTIONS[section]["fields"]}
+        fields.update(section_defaults)
+        if on_field is not None:
+            for name, value in section_defaults.items():
+                on_field(name, value)
+    return DashboardData(**fields)
+
+
+def generate_dashboard_data(all_wizard_data: dict, all_contexts=None,
+                            on_field: Optional[Callable[[str, Any], None]] = None,
+                            force: bool = False) -> DashboardData:
+    """
+    Generate comprehensive dashboard data from all wizard steps.
+    
+    Sections are generated concurrently (see agenerate_dashboard_data).
+    
+    Args:
+        all_wizard_data: Complete data from all wizard steps
+        all_contexts: RAG contexts from each step (optional)
+        on_field: Called with (field name, value) as each field is complete,
+            to show fields while the rest are still being generated (optional)
+        force: Regenerate sections even if cached responses exist
+    
+    Returns:
+        DashboardData: Structured data for dashboard auto-fill
+    """
+    async def run():
+        async_client = get_async_client()
+        try:
+            return await agenerate_dashboard_data(async_client, all_wizard_data, all_contexts, on_field, force)
+        finally:
+            await async_client.close()
+    
+    try:
+        return asyncio.run(run())
     except Exception as e:
+        logger.error(f"Error generating dashboard data: {e}")
         # Return comprehensive dashboard data with professional error content
-        return DashboardData(
-            # Overview
-            project_overview="Professional ERDF project for regional development",
-            support_scheme_description="This project seeks support under the European Regional Development Fund (ERDF) framework, specifically designed to promote smart and sustainable growth in the region. The ERDF aims to strengthen economic, social and territorial cohesion by correcting imbalances between regions.",
-            project_summary="This comprehensive regional development project aims to address key challenges in the region through innovative approaches and sustainable solutions. The project aligns with EU strategic objectives and regional development priorities.",
-            project_objectives="The project aims to achieve measurable improvements in regional competitiveness and sustainability through targeted interventions and stakeholder engagement.",
-            expected_outcomes="Expected outcomes include enhanced regional capacity, improved stakeholder collaboration, and measurable progress toward sustainability goals.",
-            
-            # Project Owner
-            legal_code_form="Aktiebolag (AB)",
-            industry_code_name="NACE Code 84.11 - General public administration activities",
-            country="Sweden",
-            vat_registration_number="SE556789123401",
-            bank_account_number="Swedbank: 8000-9 123 456 789-0",
-            organization_description="Established regional organization with extensive experience in project management and stakeholder engagement.",
-            organization_capacity="The organization has demonstrated capacity to manage complex EU-funded projects with proven track record in regional development.",
-            main_contact_info="Primary contact established with relevant expertise and authority to represent the organization.",
-            
-            # Project Partner (defaults)
-            partner_org_number="556123-4567",
-            partner_name="Regional Development Partner AB",
-            partner_post_code="123 45",
-            partner_visiting_address="Utvecklingsgatan 12",
-            partner_city="Stockholm",
-            partner_industry_code="NACE 84.12",
-            partner_vat_number="SE556123456701",
-            
-            # All other fields with professional defaults
-            current_situation="The current regional situation presents challenges that require targeted intervention and coordinated action.",
-            identified_challenges="Key challenges have been identified through stakeholder consultation and regional analysis.",
-            needs_analysis="Comprehensive needs analysis has been conducted to inform project design and implementation strategy.",
-            agenda_2030_justification="The project contributes to multiple SDG goals through targeted interventions and measurable outcomes.",
-            target_group_description="The target group consists of key regional stakeholders who will benefit from project interventions.",
-            beneficiary_analysis="Beneficiaries have been identified through comprehensive stakeholder mapping and needs assessment.",
-            stakeholder_engagement="Stakeholder engagement strategy ensures inclusive participation throughout project lifecycle.",
-            target_group_global_goals_impact="Work packages are designed to contribute to global sustainability goals while managing potential conflicts through coordinated planning.",
-            activity_summary="Project activities are structured to achieve maximum impact through coordinated implementation.",
-            implementation_plan="Implementation follows established project management principles with clear milestones and deliverables.",
-            work_package_name="WP1: Regional Analysis, WP2: Stakeholder Engagement, WP3: Implementation, WP4: Evaluation",
-            activity_name="Stakeholder workshops, capacity building, monitoring and evaluation",
-            work_package_global_goals_impact="All work packages contribute to global sustainability goals through targeted interventions.",
-            expected_results="The project will deliver measurable results aligned with regional development objectives.",
-            impact_indicators="Impact will be measured through established indicators and regular monitoring.",
-            results_location="Results will arise primarily in the target region with potential for broader application.",
-            capacity_ability_gains="Target groups will gain enhanced capacity and access to improved services and opportunities.",
-            behavioral_changes="Strengthened capabilities are expected to lead to more sustainable practices and improved collaboration.",
-            target_value="Specific target values will be established based on baseline measurements and regional priorities.",
-            results_remarks="Results will be documented and disseminated to ensure broader learning and application.",
-            success_measures="Success will be measured through quantitative and qualitative indicators aligned with project objectives.",
-            organizational_structure="Project organization follows established governance structures with clear roles and responsibilities.",
-            management_capacity="Management capacity has been demonstrated through previous project experience and organizational expertise.",
-            project_organization_structure="The project will be structured with clear governance, management, and implementation layers.",
-            similar_projects_awareness="The organization is aware of similar initiatives and will coordinate to ensure complementarity.",
-            inclusive_culture_approach="The project will implement inclusive practices to ensure equal opportunities for all participants.",
-            sustainability_expertise="Sustainability expertise exists within the organization and will be further strengthened as needed.",
-            external_collaboration="The project will collaborate with external actors to maximize impact and ensure sustainability.",
-            collaboration_description="Collaboration will involve knowledge sharing, resource coordination, and joint implementation activities.",
-            baltic_sea_strategy="The project aligns with Baltic Sea Strategy objectives where applicable.",
-            baltic_sea_contribution="Contribution to Baltic Sea Strategy goals will be achieved through coordinated regional action.",
-            methodology="The project employs established methodologies adapted to regional context and requirements.",
-            project_management="Project management follows international standards with appropriate governance structures.",
-            quality_assurance="Quality assurance measures ensure project deliverables meet established standards.",
-            reporting_capability="Reporting capability has been established through appropriate systems and procedures.",
-            communication_approach="Communication strategy ensures effective information sharing among all stakeholders.",
-            gender_statistics_routine="Gender-disaggregated statistics will be collected and reported according to established procedures.",
-            gender_reporting_commitment="The organization commits to reporting gender distribution as required by funding guidelines.",
-            procurement_approach="Procurement will follow applicable regulations ensuring transparency and value for money.",
-            co_financing_management="Co-financing and liquidity management systems are in place to ensure project sustainability.",
-            risk_identification_measures="Comprehensive risk management includes identification, assessment, and mitigation measures.",
-            guidelines_compliance="The project will comply with all applicable guidelines and regulatory requirements.",
-            results_documentation_utilization="Results will be documented and utilized through established dissemination and learning strategies.",
-            budget_overview="Total project budget reflects realistic cost estimates aligned with project objectives and activities.",
-            financial_plan="Financial planning ensures sustainable funding throughout project lifecycle.",
-            cost_breakdown="Cost breakdown provides transparent allocation of resources across project components."
-        )
+        return default_dashboard_data()
 
 
 # def generate_work_packages_from_ai(user_input, client, max_tokens=1200):
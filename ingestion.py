@@ -0,0 +1,288 @@
+"""
+Parallel ingestion pipeline for DocumentRAG
+Runs document ingestion as three stages connected by bounded queues:
+extraction and chunking in a process pool, embedding in a thread pool and
+batched upserts in a single writer thread. Bounded queues give backpressure,
+so a slow stage throttles the ones before it instead of buffering everything.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Dict, Any, Optional
+
+from text_utils import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+def extract_and_chunk(file_path: str, chunk_size: int, overlap: int) -> Dict[str, Any]:
+    """Extract and chunk one document (runs in a worker process)"""
+    from rag import extract_text_from_docx
+    from chunking import chunk_text
+
+    try:
+        text = extract_text_from_docx(file_path)
+        if not text:
+            return {"file_path": file_path, "chunks": [], "error": "No text extracted"}
+        return {"file_path": file_path, "chunks": chunk_text(text, chunk_size, overlap), "metadata": None, "error": None}
+    except Exception as e:
+        return {"file_path": file_path, "chunks": [], "error": str(e)}
+
+
+class IngestionPipeline:
+    """Staged extract / embed / upsert pipeline on top of a DocumentRAG instance"""
+
+    def __init__(self, rag, extract_workers: int = None, embed_workers: int = None, queue_size: int = None,
+                 extractor: Callable[[str, int, int], Dict[str, Any]] = None, namespace: Optional[str] = None):
+        """
+        Args:
+            rag: DocumentRAG providing planning, embedding and index access
+            extract_workers: Worker processes for extraction (1 runs inline)
+            embed_workers: Concurrent embedding requests
+            queue_size: Capacity of each queue between stages
+            extractor: Picklable module-level function (file_path, chunk_size, overlap)
+                returning {"file_path", "chunks", "metadata", "error"}; defaults to
+                plain text extraction and chunking
+            namespace: Shared namespace for all documents instead of one per document
+        """
+        self.rag = rag
+        self.extractor = extractor or extract_and_chunk
+        self.namespace = namespace
+        self.extract_workers = extract_workers or rag.extract_workers
+        self.embed_workers = embed_workers or rag.embed_workers
+        self.queue_size = queue_size or rag.pipeline_queue_size
+
+        self.extracted: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self.embed_jobs: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self.upserts: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def run(self, file_paths: List[str], force: bool = False) -> List[Dict[str, Any]]:
+        """Ingest the given files and return one result dict per file, in input order"""
+        pending = []
+        for file_path in file_paths:
+            try:
+                file_hash = self.rag.hash_file(file_path)
+            except Exception as e:
+                self.results[file_path] = {"status": "failed", "filename": os.path.basename(file_path), "reason": str(e)}
+                continue
+
+            unchanged = None if force else self.rag.unchanged_result(file_path, file_hash)
+            if unchanged:
+                self.results[file_path] = unchanged
+            else:
+                pending.append((file_path, file_hash))
+
+        logger.info(f"Ingesting {len(pending)} of {len(file_paths)} documents "
+                    f"({self.extract_workers} extract workers, {self.embed_workers} embed workers)")
+
+        if pending:
+            threads = [threading.Thread(target=self._extract_stage, args=(pending,), name="ingest-extract")]
+            threads += [
+                threading.Thread(target=self._embed_stage, name=f"ingest-embed-{i}")
+                for i in range(self.embed_workers)
+            ]
+            threads.append(threading.Thread(target=self._upsert_stage, name="ingest-upsert"))
+            for thread in threads:
+                thread.start()
+
+            self._plan_stage(force)
+            for thread in threads:
+                thread.join()
+
+        return [
+            self.results.get(file_path) or {
+                "status": "failed", "filename": os.path.basename(file_path), "reason": "Ingestion did not complete"
+            }
+            for file_path in file_paths
+        ]
+
+    def _fail(self, file_path: str, reason: str):
+        """Record a failed document; it is retried on the next run as the manifest is not updated"""
+        logger.error(f"Ingestion of {file_path} failed: {reason}")
+        with self._lock:
+            self.results[file_path] = {"status": "failed", "filename": os.path.basename(file_path), "reason": reason}
+
+    def _extract_stage(self, pending: List[tuple]):
+        """Stage 1: extract and chunk documents, CPU bound, in worker processes"""
+        try:
+            if self.extract_workers <= 1:
+                for file_path, file_hash in pending:
+                    try:
+                        result = self.extractor(file_path, self.rag.chunk_size, self.rag.chunk_overlap)
+                    except Exception as e:
+                        result = {"file_path": file_path, "chunks": [], "error": str(e)}
+                    self.extracted.put((result, file_hash))
+                return
+
+            # Spawned workers do not inherit this process's threads or locks
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.extract_workers, mp_context=context) as pool:
+                # At most queue_size documents are in flight, the rest wait here
+                in_flight = threading.BoundedSemaphore(self.queue_size)
+
+                def forward(future, file_path, file_hash):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"file_path": file_path, "chunks": [], "error": str(e)}
+                    self.extracted.put((result, file_hash))
+                    in_flight.release()
+
+                for file_path, file_hash in pending:
+                    in_flight.acquire()
+                    future = pool.submit(self.extractor, file_path, self.rag.chunk_size, self.rag.chunk_overlap)
+                    future.add_done_callback(lambda f, p=file_path, h=file_hash: forward(f, p, h))
+        finally:
+            self.extracted.put(_DONE)
+
+    def _plan_stage(self, force: bool):
+        """Diff extracted documents against the manifest and queue embedding batches"""
+        try:
+            while True:
+                item = self.extracted.get()
+                if item is _DONE:
+                    break
+                result, file_hash = item
+                file_path = result["file_path"]
+
+                if result["error"]:
+                    logger.warning(f"Extraction failed for {file_path}: {result['error']}")
+                    self.results[file_path] = {
+                        "status": "failed", "filename": os.path.basename(file_path), "reason": result["error"]
+                    }
+                    continue
+
+                try:
+                    plan = self.rag.plan_document_update(
+                        file_path, result["chunks"], force=force,
+                        namespace=self.namespace, chunk_metadata=result.get("metadata")
+                    )
+                    self.rag.prepare_namespace(plan)
+                except Exception as e:
+                    self._fail(file_path, f"Planning error: {e}")
+                    continue
+
+                texts = [record["text"] for record in plan["to_embed"]]
+                batches = self.rag._batch_by_token_budget([count_tokens(text) for text in texts])
+
+                with self._lock:
+                    self.documents[file_path] = {
+                        "plan": plan,
+                        "file_hash": file_hash,
+                        "batches_left": len(batches),
+                        "chunk_errors": {},
+                        "embedded": 0,
+                        "upsert_results": [],
+                    }
+
+                if not batches:
+                    self.upserts.put(("finalize", file_path))
+                for batch in batches:
+                    self.embed_jobs.put((file_path, [plan["to_embed"][i] for i in batch]))
+        finally:
+            for _ in range(self.embed_workers):
+                self.embed_jobs.put(_DONE)
+
+    def _embed_stage(self):
+        """Stage 2: embed batches of chunks, network bound, one request per batch"""
+        try:
+            while True:
+                job = self.embed_jobs.get()
+                if job is _DONE:
+                    break
+                file_path, records = job
+                document = self.documents[file_path]
+                plan = document["plan"]
+
+                vectors = []
+                try:
+                    embeddings, errors = self.rag.get_embeddings([record["text"] for record in records])
+                    for position, (record, embedding) in enumerate(zip(records, embeddings)):
+                        if embedding is None:
+                            with self._lock:
+                                document["chunk_errors"][record["chunk_index"]] = errors.get(position)
+                            continue
+                        vectors.append(self.rag.build_vector(plan, record, embedding))
+                except Exception as e:
+                    # The batch counts as done so the document is still finalized, with these chunks failed
+                    logger.error(f"Embedding batch of {file_path} failed: {e}")
+                    vectors = []
+                    with self._lock:
+                        for record in records:
+                            document["chunk_errors"][record["chunk_index"]] = str(e)
+
+                if vectors:
+                    self.upserts.put(("vectors", file_path, vectors))
+
+                with self._lock:
+                    document["batches_left"] -= 1
+                    last_batch = document["batches_left"] == 0
+                if last_batch:
+                    self.upserts.put(("finalize", file_path))
+        finally:
+            self.upserts.put(_DONE)
+
+    def _upsert_stage(self):
+        """Stage 3: buffer vectors per namespace and write them in batches"""
+        buffers: Dict[str, List[Dict[str, Any]]] = {}
+        workers_left = self.embed_workers
+
+        # Errors are recorded per document and the queue is always drained, so the
+        # embed workers never block on a full queue
+        while workers_left:
+            item = self.upserts.get()
+            if item is _DONE:
+                workers_left -= 1
+                continue
+
+            file_path = item[1]
+            try:
+                if item[0] == "vectors":
+                    buffer = buffers.setdefault(file_path, [])
+                    buffer.extend(item[2])
+                    if len(buffer) >= self.rag.upsert_batch_size:
+                        self._flush(file_path, buffer)
+                else:
+                    self._flush(file_path, buffers.pop(file_path, []))
+                    self._finalize(file_path)
+            except Exception as e:
+                buffers.pop(file_path, None)
+                self.documents[file_path]["error"] = str(e)
+                if item[0] == "finalize":
+                    self._fail(file_path, f"Index update error: {e}")
+
+    def _flush(self, file_path: str, buffer: List[Dict[str, Any]]):
+        """Upsert and clear a document's buffered vectors"""
+        if not buffer:
+            return
+        document = self.documents[file_path]
+        # Size-aware batches with retries; batches that keep failing are spooled
+        document["upsert_results"].extend(
+            self.rag.upsert_vectors(buffer, document["plan"]["namespace"])
+        )
+        document["embedded"] += len(buffer)
+        buffer.clear()
+
+    def _finalize(self, file_path: str):
+        """Record a fully embedded and upserted document"""
+        document = self.documents[file_path]
+        plan = document["plan"]
+        if document.get("error"):
+            # Vectors were lost; the document is not recorded so the next run redoes it
+            self._fail(file_path, f"Upsert error: {document['error']}")
+            return
+        self.results[file_path] = self.rag.finalize_document(
+            plan, document["file_hash"], document["embedded"], document["chunk_errors"], document["upsert_results"]
+        )
+        logger.info(f"Finished {plan['filename']}: {self.results[file_path]['status']}")
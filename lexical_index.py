@@ -0,0 +1,178 @@
+"""
+Local lexical (BM25) index
+Keeps an inverted index of every chunk next to the vectors, one JSON file per
+namespace, so exact terms such as municipality names, "LOU", "Agenda 2030" or
+Swedish work-package names can be matched literally. Also answers on its own
+when the embedding API is slow or unavailable.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from vector_store import matches_filter
+
+logger = logging.getLogger(__name__)
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; numbers are kept so SDG numbers and years match"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _NamespaceIndex:
+    """Chunks of one namespace and the statistics BM25 needs"""
+
+    def __init__(self, chunks: Dict[str, Dict[str, Any]], stamp=None):
+        self.chunks = chunks
+        self.stamp = stamp
+        self.postings: Dict[str, Dict[str, int]] = {}
+        total_length = 0
+        for chunk_id, chunk in chunks.items():
+            total_length += chunk["length"]
+            for term, count in chunk["tf"].items():
+                self.postings.setdefault(term, {})[chunk_id] = count
+        self.average_length = total_length / len(chunks) if chunks else 0.0
+
+
+class LexicalIndex:
+    """BM25 inverted index per namespace, persisted as JSON"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Directory holding one JSON file per namespace
+        """
+        self.path = Path(path)
+        self._namespaces: Dict[str, _NamespaceIndex] = {}
+        self._lock = threading.RLock()
+
+    def _file(self, namespace: str) -> Path:
+        name = re.sub(r"[^\w\-]", "_", namespace) or "__default__"
+        return self.path / f"{name}.json"
+
+    def _load(self, namespace: str) -> _NamespaceIndex:
+        """Namespace index, reloaded if another process has written it since"""
+        file_path = self._file(namespace)
+        stamp = file_path.stat().st_mtime_ns if file_path.exists() else None
+        index = self._namespaces.get(namespace)
+        if index is not None and index.stamp == stamp:
+            return index
+
+        chunks = {}
+        if stamp is not None:
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    chunks = json.load(f)["chunks"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Error loading lexical index for {namespace}: {e}")
+        index = _NamespaceIndex(chunks, stamp)
+        self._namespaces[namespace] = index
+        return index
+
+    def _save(self, namespace: str, chunks: Dict[str, Dict[str, Any]]):
+        file_path = self._file(namespace)
+        if not chunks:
+            if file_path.exists():
+                file_path.unlink()
+            self._namespaces.pop(namespace, None)
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"namespace": namespace, "chunks": chunks}, f, ensure_ascii=False)
+        os.replace(tmp_path, file_path)
+        self._namespaces[namespace] = _NamespaceIndex(chunks, file_path.stat().st_mtime_ns)
+
+    def has_source(self, namespace: str, source: str) -> bool:
+        """True if chunks of the source file are indexed in namespace"""
+        with self._lock:
+            return any(chunk["source"] == source for chunk in self._load(namespace).chunks.values())
+
+    def update_document(self, namespace: str, source: str, chunks: List[Dict[str, Any]]) -> None:
+        """
+        Replace the chunks of one source file in a namespace
+
+        Args:
+            namespace: Namespace the chunks belong to
+            source: Source file path, so a document can be replaced in a shared namespace
+            chunks: {"id", "text", "metadata"} dicts
+        """
+        with self._lock:
+            current = {
+                chunk_id: chunk for chunk_id, chunk in self._load(namespace).chunks.items()
+                if chunk["source"] != source
+            }
+            for chunk in chunks:
+                tokens = tokenize(chunk["text"])
+                current[chunk["id"]] = {
+                    "source": source,
+                    "text": chunk["text"],
+                    "metadata": chunk.get("metadata") or {},
+                    "tf": dict(Counter(tokens)),
+                    "length": len(tokens),
+                }
+            self._save(namespace, current)
+
+    def remove_document(self, namespace: str, source: str) -> None:
+        """Remove a source file's chunks from a namespace"""
+        self.update_document(namespace, source, [])
+
+    def drop_namespace(self, namespace: str) -> None:
+        """Remove a namespace's lexical index"""
+        with self._lock:
+            self._save(namespace, {})
+
+    def search(self, namespace: str, query: str, top_k: int = 5,
+               metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Rank a namespace's chunks against query with BM25
+
+        Returns:
+            {"id", "score", "text", "metadata"} dicts, best first; chunks that
+            share no term with the query are not returned
+        """
+        with self._lock:
+            index = self._load(namespace)
+        if not index.chunks or top_k <= 0:
+            return []
+
+        scores: Dict[str, float] = {}
+        n_chunks = len(index.chunks)
+        for term in set(tokenize(query)):
+            postings = index.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, count in postings.items():
+                length_norm = 1 - BM25_B + BM25_B * index.chunks[chunk_id]["length"] / (index.average_length or 1)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * count * (BM25_K1 + 1) / (count + BM25_K1 * length_norm)
+
+        if metadata_filter:
+            scores = {
+                chunk_id: score for chunk_id, score in scores.items()
+                if matches_filter(index.chunks[chunk_id]["metadata"], metadata_filter)
+            }
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [
+            {
+                "id": chunk_id,
+                "score": score,
+                "text": index.chunks[chunk_id]["text"],
+                "metadata": dict(index.chunks[chunk_id]["metadata"]),
+            }
+            for chunk_id, score in ranked
+        ]
@@ -0,0 +1,113 @@
+"""
+Persistent LLM response cache
+Stores parsed structured-output responses in SQLite, keyed by request name,
+canonicalized input, hashes of the context and system prompt, model,
+response schema version, temperature and max tokens, with a size cap
+enforced by least-recently-used eviction (see sqlite_lru.py).
+Going back and forth in the wizard or resubmitting unchanged input returns
+the stored result instead of making another call.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel
+
+from sqlite_lru import SizeCappedStore
+
+logger = logging.getLogger(__name__)
+
+
+def canonicalize(value: Any) -> Any:
+    """JSON-compatible form of value that ignores dict order and surrounding whitespace"""
+    if isinstance(value, BaseModel):
+        return canonicalize(value.model_dump())
+    if isinstance(value, dict):
+        return {str(key): canonicalize(item) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+def schema_version(response_format: Type[BaseModel]) -> str:
+    """Hash of the response model's JSON schema, so changing the model invalidates its entries"""
+    schema = json.dumps(response_format.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMResponseCache(SizeCappedStore):
+    """SQLite-backed cache of parsed LLM responses with LRU eviction"""
+
+    table = "responses"
+    columns = "name TEXT NOT NULL, model TEXT NOT NULL, response TEXT NOT NULL, last_used REAL NOT NULL"
+    value_column = "response"
+    entry_name = "responses"
+
+    def __init__(self, path, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            path: SQLite database file
+            max_bytes: Upper bound for the total size of stored responses
+        """
+        super().__init__(path, max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(name: str, user_input: Any, context: str, model: str,
+                 response_format: Type[BaseModel], temperature: float,
+                 system_prompt: str = "", max_tokens: Optional[int] = None) -> str:
+        """Cache key for one structured-output request; editing the system prompt invalidates its entries"""
+        parts = {
+            "name": name,
+            "input": canonicalize(user_input),
+            "context": hashlib.sha256((context or "").strip().encode("utf-8")).hexdigest(),
+            "model": model,
+            "schema": f"{response_format.__name__}:{schema_version(response_format)}",
+            "temperature": temperature,
+            "system_prompt": hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+            "max_tokens": max_tokens,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def get(self, key: str, response_format: Type[BaseModel]) -> Optional[BaseModel]:
+        """Return the cached response parsed as response_format, or None"""
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+                self.hits += 1
+            return response_format.model_validate_json(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+    def put(self, key: str, name: str, model: str, response: BaseModel) -> None:
+        """Store a parsed response and evict old entries if over the size cap"""
+        payload = response.model_dump_json()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, name, model, response, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, name, model, payload, time.time())
+                )
+                self._conn.commit()
+                self._added(len(payload.encode("utf-8")))
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Number of cached responses, their total size in bytes, and hits/misses of this process"""
+        return {**super().stats(), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,160 @@
+"""
+Namespace catalogue
+Keeps a local JSON record of the index's namespaces with their vector count,
+source file, content hash and last-indexed time. Ingestion and deletion update
+it directly and the index stats are only consulted when it is older than its
+TTL, so listing namespaces normally needs no network call. The file is
+reloaded when another process (the rag page, an ingestion job) changes it.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Index stats are eventually consistent; namespaces recorded this recently are
+# kept even if the stats do not list them yet
+SYNC_GRACE_SECONDS = 60
+
+
+class NamespaceCatalogue:
+    """JSON-backed catalogue of namespaces, refreshed from index stats on a TTL"""
+
+    def __init__(self, path, ttl: float = 300):
+        """
+        Args:
+            path: JSON file holding the catalogue
+            ttl: Seconds after which the catalogue is re-synced with the index stats
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._stamp = self._file_stamp()
+        self._data = self._load()
+
+    def _file_stamp(self):
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self) -> None:
+        """Reload the catalogue if another process has written it since it was read"""
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                self._stamp = stamp
+                self._data = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                data.setdefault("namespaces", {})
+                data.setdefault("version", 0)
+                return data
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read namespace catalogue, starting empty: {e}")
+        return {"version": 0, "synced_at": None, "namespaces": {}}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._file_stamp()
+
+    @property
+    def version(self) -> int:
+        """Increases whenever a namespace is indexed, removed or changed by a sync, in any process"""
+        self._refresh()
+        return self._data["version"]
+
+    def is_stale(self) -> bool:
+        """True if the catalogue has never been synced or was synced more than ttl seconds ago"""
+        self._refresh()
+        synced_at = self._data.get("synced_at")
+        return synced_at is None or time.time() - synced_at > self.ttl
+
+    def invalidate(self) -> None:
+        """Force a sync with the index stats on next use"""
+        with self._lock:
+            self._refresh()
+            self._data["synced_at"] = None
+
+    def namespaces(self) -> List[str]:
+        """Names of catalogued namespaces that hold vectors"""
+        with self._lock:
+            self._refresh()
+            return [name for name, entry in self._data["namespaces"].items() if entry.get("vector_count")]
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of all catalogue entries by namespace"""
+        with self._lock:
+            self._refresh()
+            return {name: dict(entry) for name, entry in self._data["namespaces"].items()}
+
+    def get(self, namespace: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            entry = self._data["namespaces"].get(namespace)
+            return dict(entry) if entry else None
+
+    def record(self, namespace: str, vector_count: int, source_file: Optional[str] = None,
+               content_hash: Optional[str] = None, last_indexed: Optional[str] = None) -> None:
+        """Add or replace a namespace entry after it was indexed"""
+        with self._lock:
+            # Reloaded first so changes by other processes are not overwritten
+            self._refresh()
+            self._data["namespaces"][namespace] = {
+                "vector_count": vector_count,
+                "source_file": source_file,
+                "content_hash": content_hash,
+                "last_indexed": last_indexed,
+                "recorded_at": time.time(),
+            }
+            self._data["version"] += 1
+            self._save()
+
+    def remove(self, namespace: str) -> None:
+        """Drop a deleted namespace"""
+        with self._lock:
+            self._refresh()
+            if self._data["namespaces"].pop(namespace, None) is not None:
+                self._data["version"] += 1
+                self._save()
+
+    def sync(self, vector_counts: Dict[str, int]) -> None:
+        """
+        Reconcile with the index stats: update vector counts, add namespaces the
+        catalogue did not know and drop the ones that are gone from the index
+        """
+        with self._lock:
+            self._refresh()
+            namespaces = self._data["namespaces"]
+            changed = False
+            now = time.time()
+            for name in list(namespaces):
+                recent = now - (namespaces[name].get("recorded_at") or 0) < SYNC_GRACE_SECONDS
+                if name not in vector_counts and not recent:
+                    del namespaces[name]
+                    changed = True
+            for name, count in vector_counts.items():
+                entry = namespaces.setdefault(name, {
+                    "vector_count": None, "source_file": None, "content_hash": None,
+                    "last_indexed": None, "recorded_at": None
+                })
+                if entry["vector_count"] != count:
+                    entry["vector_count"] = count
+                    changed = True
+            if changed:
+                self._data["version"] += 1
+            self._data["synced_at"] = now
+            self._save()
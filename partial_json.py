@@ -0,0 +1,87 @@
+"""
+Incremental JSON object parser
+Parses a JSON object as it is streamed and reports each top-level field as
+soon as its value is complete, so structured output can be shown field by
+field while the rest is still being generated.
+"""
+
+import json
+import logging
+from typing import Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\n\r"
+# A value can only have been completed by a chunk containing one of these
+_VALUE_ENDS = frozenset('"]},')
+
+
+class PartialObjectParser:
+    """Streaming parser for one top-level JSON object"""
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.done = False
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Add streamed text
+
+        Args:
+            chunk: Next piece of the JSON document
+
+        Returns:
+            (field, value) pairs completed by this chunk, in document order
+        """
+        self._buffer += chunk
+        if self.done or not _VALUE_ENDS.intersection(chunk):
+            return []
+
+        fields = []
+        while not self.done:
+            field = self._next_field()
+            if field is None:
+                break
+            fields.append(field)
+        return fields
+
+    def _skip(self, pos: int, characters: str = _WHITESPACE) -> int:
+        while pos < len(self._buffer) and self._buffer[pos] in characters:
+            pos += 1
+        return pos
+
+    def _next_field(self):
+        """Parse the field at the current position, or return None if it is not complete yet"""
+        pos = self._skip(self._pos)
+        if not self._started:
+            if pos >= len(self._buffer):
+                return None
+            if self._buffer[pos] != "{":
+                raise ValueError(f"Expected a JSON object, got {self._buffer[pos]!r}")
+            self._started = True
+            self._pos = pos = self._skip(pos + 1)
+
+        pos = self._skip(pos, _WHITESPACE + ",")
+        if pos < len(self._buffer) and self._buffer[pos] == "}":
+            self.done = True
+            return None
+
+        try:
+            key, pos = self._decoder.raw_decode(self._buffer, pos)
+            pos = self._skip(pos)
+            if pos >= len(self._buffer) or self._buffer[pos] != ":":
+                return None
+            value, pos = self._decoder.raw_decode(self._buffer, self._skip(pos + 1))
+        except json.JSONDecodeError:
+            # Incomplete; retried when more text arrives
+            return None
+
+        # A number at the end of the buffer may still be growing
+        end = self._skip(pos)
+        if end >= len(self._buffer):
+            return None
+        self._pos = end
+        return key, value
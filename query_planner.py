@@ -0,0 +1,94 @@
+"""
+Query planning
+Turns the input fields of a wizard step into separate sub-queries instead of
+one long concatenated query, searches them together (one batched embedding
+request, one concurrent fan-out) and fuses their rankings, so every topic the
+user wrote about gets its own embedding.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fields with fewer words (names, single goals or risks) are too short for a query of
+# their own; they are searched together as one combined sub-query
+MIN_QUERY_WORDS = 2
+
+_LETTER_RE = re.compile(r"[^\W\d_]", re.UNICODE)
+
+
+def plan_queries(user_input: Any) -> List[str]:
+    """
+    Sub-queries for a step's input
+
+    Args:
+        user_input: Step input dict (one sub-query per text or list field) or a plain string
+
+    Returns:
+        Distinct sub-queries in field order; fields shorter than MIN_QUERY_WORDS
+        are joined into one last sub-query, and fields without any words
+        (phone numbers, dates) are left out
+    """
+    values = user_input.values() if isinstance(user_input, dict) else [user_input]
+    queries, short_values = [], []
+    for value in values:
+        if isinstance(value, list):
+            value = " ".join(str(item) for item in value if item)
+        if not isinstance(value, str):
+            continue
+        value = value.strip()
+        words = [word for word in value.split() if _LETTER_RE.search(word)]
+        if not words:
+            continue
+        if len(words) < MIN_QUERY_WORDS:
+            short_values.append(value)
+        elif value not in queries:
+            queries.append(value)
+    short_query = " ".join(dict.fromkeys(short_values))
+    if short_query and short_query not in queries:
+        queries.append(short_query)
+    return queries
+
+
+def planned_search(rag, queries: List[str], namespaces: List[str], top_k: int = 3,
+                   mode: Optional[str] = None,
+                   metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Search all sub-queries and fuse their rankings
+
+    Args:
+        rag: DocumentRAG instance
+        queries: Sub-queries from plan_queries
+        namespaces: Namespaces to search
+        top_k: Results per namespace after fusion
+        mode: "hybrid", "vector" or "lexical" (defaults to rag.search_mode)
+        metadata_filter: Optional Pinecone-style metadata filter
+
+    Returns:
+        Results from all namespaces, best score first
+    """
+    if not queries:
+        return []
+    per_query = rag.search_queries(queries, namespaces, top_k=top_k, mode=mode, metadata_filter=metadata_filter)
+
+    # One ranking per sub-query over all namespaces (scores comparable across them),
+    # then one fusion over the sub-queries
+    rankings = {}
+    for position, by_namespace in enumerate(per_query):
+        ranking = rag.merge_results([by_namespace.get(namespace, []) for namespace in dict.fromkeys(namespaces)])
+        if ranking:
+            rankings[f"query_{position}"] = ranking
+    fused = rag.fuse_rankings(rankings, sum(len(ranking) for ranking in rankings.values()))
+
+    # At most top_k results per namespace, as for a single query
+    results = []
+    per_namespace: Dict[str, int] = {}
+    for result in fused:
+        if per_namespace.get(result["namespace"], 0) < top_k:
+            per_namespace[result["namespace"]] = per_namespace.get(result["namespace"], 0) + 1
+            results.append(result)
+
+    logger.info(f"Planned search: {len(queries)} sub-queries, {len(results)} results")
+    return results
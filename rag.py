@@ -1,56 +1,248 @@
 """
 RAG (Retrieval-Augmented Generation) System
 Processes documents from classification_documents folder and stores them in Pinecone
+(or a local in-process index)
 Each document gets its own namespace based on the document name
-Uses OpenAI ada-002 embedding model
+Embeds with OpenAI text-embedding-ada-002 by default or a local backend (see embeddings.py)
 """
 
 import streamlit as st
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import hashlib
+import json
+import threading
+import time
+import random
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
 
 # Third-party imports
 from pinecone import Pinecone, ServerlessSpec
 from openai import OpenAI
-import docx2txt
-from docx import Document
+
+from text_utils import count_tokens
+from chunking import chunk_text
+from docx_extract import iter_docx_blocks, blocks_to_text
+from ingestion import IngestionPipeline
+from embedding_cache import EmbeddingCache
+from embeddings import create_embedding_backend, LEGACY_SIGNATURE
+from settings import get_setting
+from vector_store import LocalVectorIndex
+from namespace_catalogue import NamespaceCatalogue
+from lexical_index import LexicalIndex
+from warmup import WarmContext
+from retrieval_cache import RetrievalCache
+from chunk_store import ChunkStore
+from exemplars import EXEMPLAR_NAMESPACE, extract_exemplar_units
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def extract_text_from_docx(file_path: str) -> str:
+    """Extract text content from .docx file
+    
+    Module-level so ingestion worker processes can run it without a DocumentRAG.
+    """
+    try:
+        # Single streaming pass over word/document.xml (paragraphs, headings, tables)
+        return blocks_to_text(iter_docx_blocks(file_path)).strip()
+        
+    except Exception as e:
+        logger.error(f"Error extracting text from {file_path}: {e}")
+        return ""
+
+
 class DocumentRAG:
     """RAG system for processing and storing documents in Pinecone"""
     
     def __init__(self):
         """Initialize the RAG system with API keys and clients"""
         try:
-            # Initialize OpenAI client
-            self.openai_client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+            # Embedding configuration; EMBEDDING_BACKEND "local" embeds without network access
+            self.embedding_dimension = int(get_setting("EMBEDDING_DIMENSION", 1024))  # Match Pinecone index dimension
+            self.embedding_max_input_tokens = 8191  # Model limit for a single input
+            backend_name = get_setting("EMBEDDING_BACKEND", "openai")
             
-            # Initialize Pinecone
-            self.pc = Pinecone(api_key=st.secrets["PINECONE_API_KEY"])
-            self.index_name = st.secrets["PINECONE_INDEX"]
-            self.pinecone_env = st.secrets["PINECONE_ENV"]
+            # Initialize OpenAI client (only the OpenAI backend needs it)
+            self.openai_client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"]) if backend_name == "openai" else None
+            
+            self.embedding_backend = create_embedding_backend(
+                backend_name,
+                self.embedding_dimension,
+                openai_client=self.openai_client,
+                model=get_setting("EMBEDDING_MODEL"),
+                max_input_tokens=self.embedding_max_input_tokens
+            )
+            self.embedding_model = self.embedding_backend.model
+            logger.info(f"Using embedding backend {self.embedding_backend.signature}")
+            
+            # Local state (manifest, caches, local index)
+            self.data_dir = Path("rag_store")
+            
+            # Vector store; VECTOR_STORE "local" keeps the index in process (see vector_store.py)
+            self.vector_store = get_setting("VECTOR_STORE", "pinecone").lower()
+            if self.vector_store == "local":
+                # The local index has its own manifest and pending upserts
+                self.index_dir = self.data_dir / "local_index"
+            else:
+                self.index_dir = self.data_dir
+                self.index_name = st.secrets["PINECONE_INDEX"]
+                self.pinecone_env = st.secrets["PINECONE_ENV"]
+            
+            # The index is connected on first use (see the index property)
+            self.pc = None
+            self._index = None
+            self._index_lock = threading.Lock()
+            
+            # Chunking and embedding request configuration
+            self.chunk_size = 250  # Tokens per chunk
+            self.chunk_overlap = 40  # Max overlap between chunks, in whole sentences
+            self.embedding_batch_size = 256  # Max inputs per embeddings request
+            self.embedding_batch_tokens = 100_000  # Token budget per embeddings request
             
-            # Get or create index
-            self.index = self._get_or_create_index()
+            # Local state for incremental re-indexing
+            self.manifest_path = self.index_dir / "manifest.json"
+            self._manifest_lock = threading.RLock()
+            self._manifest_stamp = self._manifest_file_stamp()
+            self._manifest = self._load_manifest()
             
-            # Embedding model configuration
-            self.embedding_model = "text-embedding-ada-002"
-            self.embedding_dimension = 1024  # Match Pinecone index dimension
-            self.chunk_size = 1000  # Characters per chunk
-            self.chunk_overlap = 200  # Overlap between chunks
+            # Embeddings are cached on disk and shared by ingestion and search
+            self.embedding_cache = EmbeddingCache(self.data_dir / "embeddings.sqlite", max_bytes=256 * 1024 * 1024)
             
-            logger.info("DocumentRAG initialized successfully")
+            # Chunk text and full metadata live locally; vectors only carry the fields searches filter on
+            self.chunk_store = ChunkStore(self.index_dir / "chunks.sqlite")
+            
+            # Ingestion pipeline concurrency
+            self.extract_workers = max(1, min(4, (os.cpu_count() or 2) - 1))  # Extraction processes
+            self.embed_workers = 4  # Concurrent embedding requests
+            self.pipeline_queue_size = 8  # Items buffered between pipeline stages
+            self.upsert_batch_size = 100  # Vectors per upsert request
+            self.upsert_max_request_bytes = 2 * 1024 * 1024  # Pinecone request size limit
+            self.upsert_max_retries = 5  # Attempts per upsert batch
+            self.upsert_backoff_seconds = 1.0  # Initial retry delay, doubled per attempt
+            self.pending_upserts_path = self.index_dir / "pending_upserts.jsonl"
+            
+            # Retrieval fan-out: concurrent namespace queries on a shared thread pool
+            self.search_concurrency = 8  # Namespace queries running at once
+            self.search_timeout_seconds = 5.0  # Namespace queries running longer are left out of results
+            self.search_queue_timeout_seconds = 5.0  # Namespace queries waiting longer for a worker are dropped
+            self._search_pool = None
+            self._search_pool_lock = threading.Lock()
+            # Query embeddings have their own pool, so they do not queue behind namespace queries
+            self.embedding_concurrency = 4
+            self._embedding_pool = None
+            
+            # Local catalogue of namespaces, re-synced with the index stats after the TTL
+            self.namespace_catalogue = NamespaceCatalogue(self.index_dir / "namespaces.json", ttl=300)
+            # Baseline step context from the canonical step queries (see warmup.py)
+            self.warm_context = WarmContext(self.index_dir / "warm_context.json")
+            # Per-namespace results shared by all sessions, keyed by index_version
+            self.retrieval_cache = RetrievalCache(max_entries=1024)
+            
+            # Hybrid retrieval: BM25 over a local inverted index fused with vector ranks
+            self.lexical_index = LexicalIndex(self.index_dir / "lexical")
+            self.search_mode = get_setting("SEARCH_MODE", "hybrid").lower()  # "hybrid", "vector" or "lexical"
+            if self.search_mode not in ("hybrid", "vector", "lexical"):
+                logger.warning(f"Unknown SEARCH_MODE {self.search_mode}, using hybrid")
+                self.search_mode = "hybrid"
+            self.rrf_k = 60  # Reciprocal rank fusion constant
+            self.hybrid_candidates = 3  # Candidates per ranking, as a multiple of top_k
+            self.embedding_timeout_seconds = 3.0  # Hybrid search answers lexically after this
+            self.embedding_retry_seconds = 30.0  # Hybrid search stays lexical this long after an embedding failure
+            self._embedding_unavailable_until = 0.0
+            
+            # Answers from prior applications share one namespace
+            self.exemplar_namespace = EXEMPLAR_NAMESPACE
+            
+            logger.info("DocumentRAG initialized (index connects on first use)")
             
         except Exception as e:
             logger.error(f"Error initializing DocumentRAG: {e}")
             raise
     
+    @property
+    def index(self):
+        """Vector index, connected on first use and then shared by all callers"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = self._connect_index()
+        return self._index
+    
+    @index.setter
+    def index(self, value):
+        self._index = value
+    
+    def _connect_index(self):
+        """Create the vector index client for the configured store"""
+        if self.vector_store == "local":
+            logger.info(f"Using local vector index in {self.index_dir}")
+            return LocalVectorIndex(self.index_dir / "vectors", self.embedding_dimension)
+        
+        # Initialize Pinecone
+        if self.pc is None:
+            self.pc = Pinecone(api_key=st.secrets["PINECONE_API_KEY"])
+        # Get or create index
+        return self._get_or_create_index()
+    
+    def reconnect(self) -> None:
+        """Drop the API clients so the next call connects again (e.g. after network errors or key rotation)"""
+        with self._index_lock:
+            self._index = None
+            self.namespace_catalogue.invalidate()
+            self.pc = None
+            if self.openai_client is not None:
+                self.openai_client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+                self.embedding_backend.client = self.openai_client
+        logger.info("DocumentRAG connections reset")
+    
+    def health_check(self, check_embeddings: bool = False) -> Dict[str, Any]:
+        """
+        Check that the vector index (and optionally the embedding backend) responds
+        
+        Args:
+            check_embeddings: Also embed a short text, bypassing the cache
+        
+        Returns:
+            Dict with an overall status and the status and latency of each check
+        """
+        result = {
+            "status": "ok",
+            "vector_store": self.vector_store,
+            "embedding_backend": self.embedding_backend.signature
+        }
+        
+        start = time.perf_counter()
+        try:
+            stats = self.index.describe_index_stats()
+            result["index"] = {
+                "status": "ok",
+                "namespaces": len(stats.namespaces or {}),
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1)
+            }
+        except Exception as e:
+            logger.error(f"Index health check failed: {e}")
+            result["index"] = {"status": "failed", "error": str(e)}
+            result["status"] = "failed"
+        
+        if check_embeddings:
+            start = time.perf_counter()
+            try:
+                self.embedding_backend.embed(["health check"])
+                result["embeddings"] = {"status": "ok", "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+            except Exception as e:
+                logger.error(f"Embedding health check failed: {e}")
+                result["embeddings"] = {"status": "failed", "error": str(e)}
+                result["status"] = "failed"
+        
+        return result
+    
     def _get_or_create_index(self):
         """Get existing index or create new one if it doesn't exist"""
         try:
@@ -71,6 +263,10 @@ class DocumentRAG:
                 logger.info(f"Index {self.index_name} created successfully")
             else:
                 logger.info(f"Using existing index: {self.index_name}")
+                index_dimension = getattr(self.pc.describe_index(self.index_name), "dimension", None)
+                if index_dimension and index_dimension != self.embedding_dimension:
+                    raise ValueError(f"Index {self.index_name} has dimension {index_dimension}, "
+                                     f"embeddings have {self.embedding_dimension}")
             
             return self.pc.Index(self.index_name)
             
@@ -80,89 +276,124 @@ class DocumentRAG:
     
     def extract_text_from_docx(self, file_path: str) -> str:
         """Extract text content from .docx file"""
-        try:
-            # Method 1: Using docx2txt (simpler)
-            text = docx2txt.process(file_path)
-            
-            if not text.strip():
-                # Method 2: Using python-docx (more detailed)
-                doc = Document(file_path)
-                text = ""
-                for paragraph in doc.paragraphs:
-                    text += paragraph.text + "\\n"
-                
-                # Extract text from tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            text += cell.text + " "
-                    text += "\\n"
-            
-            return text.strip()
-            
-        except Exception as e:
-            logger.error(f"Error extracting text from {file_path}: {e}")
-            return ""
+        return extract_text_from_docx(file_path)
     
     def chunk_text(self, text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
-        """Split text into overlapping chunks"""
+        """Split text into overlapping chunks sized in tokens"""
         if chunk_size is None:
             chunk_size = self.chunk_size
         if overlap is None:
             overlap = self.chunk_overlap
-        
-        if len(text) <= chunk_size:
-            return [text]
-        
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            
-            # Try to break at sentence end
-            if end < len(text):
-                # Look for sentence endings near the chunk boundary
-                sentence_ends = ['.', '!', '?', '\\n']
-                best_break = end
-                
-                for i in range(max(0, end - 100), min(len(text), end + 100)):
-                    if text[i] in sentence_ends:
-                        best_break = i + 1
-                        break
-                
-                end = best_break
-            
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-            
-            start = end - overlap
-            
-            # Prevent infinite loop
-            if start >= len(text):
-                break
-        
-        return chunks
+        return chunk_text(text, chunk_size, overlap)
     
     def get_embedding(self, text: str) -> List[float]:
-        """Get embedding for text using OpenAI ada-002"""
+        """Get embedding for text from the configured backend, served from the cache when possible"""
         try:
-            response = self.openai_client.embeddings.create(
-                model=self.embedding_model,
-                input=text
-            )
-            # Truncate embedding to match Pinecone index dimension (1024)
-            embedding = response.data[0].embedding
-            return embedding[:self.embedding_dimension]
+            backend = self.embedding_backend
+            if backend.cacheable:
+                cached = self.embedding_cache.get(self.embedding_model, self.embedding_dimension, text)
+                if cached is not None:
+                    return cached
+            
+            embedding = backend.embed([text])[0]
+            if backend.cacheable:
+                self.embedding_cache.put(self.embedding_model, self.embedding_dimension, text, embedding)
+            return embedding
             
         except Exception as e:
             logger.error(f"Error getting embedding: {e}")
             raise
     
-    def create_document_id(self, doc_name: str, chunk_index: int) -> str:
-        """Create unique ID for document chunk"""
-        content = f"{doc_name}_{chunk_index}"
+    def _batch_by_token_budget(self, token_counts: List[int]) -> List[List[int]]:
+        """Group input positions into batches that fit the request token budget"""
+        batches = []
+        current: List[int] = []
+        current_tokens = 0
+        
+        for i, tokens in enumerate(token_counts):
+            if current and (
+                current_tokens + tokens > self.embedding_batch_tokens
+                or len(current) >= self.embedding_batch_size
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(i)
+            current_tokens += tokens
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def get_embeddings(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], Dict[int, str]]:
+        """
+        Get embeddings for many texts with as few API requests as possible
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Tuple of (embeddings, errors). embeddings is aligned with texts and
+            holds None for every input that failed; errors maps the position of
+            each failed input to its error message.
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        errors: Dict[int, str] = {}
+        
+        # Only texts missing from the cache go to the backend
+        backend = self.embedding_backend
+        cached = {}
+        if backend.cacheable:
+            cached = self.embedding_cache.get_many(self.embedding_model, self.embedding_dimension, texts)
+        for i, embedding in cached.items():
+            embeddings[i] = embedding
+        
+        # Reject inputs the model cannot embed before building batches
+        pending = []
+        token_counts = []
+        for i, text in enumerate(texts):
+            if i in cached:
+                continue
+            tokens = count_tokens(text)
+            if not text.strip():
+                errors[i] = "Empty input"
+            elif tokens > self.embedding_max_input_tokens:
+                errors[i] = f"Input has {tokens} tokens, limit is {self.embedding_max_input_tokens}"
+            else:
+                pending.append(i)
+                token_counts.append(tokens)
+        
+        for batch in self._batch_by_token_budget(token_counts):
+            positions = [pending[j] for j in batch]
+            try:
+                batch_embeddings = backend.embed([texts[i] for i in positions])
+                new_embeddings = {}
+                for i, embedding in zip(positions, batch_embeddings):
+                    embeddings[i] = embedding
+                    new_embeddings[texts[i]] = embedding
+                if backend.cacheable:
+                    self.embedding_cache.put_many(self.embedding_model, self.embedding_dimension, new_embeddings)
+                
+            except Exception as e:
+                # Retry one by one so a single bad input does not fail the whole batch
+                logger.warning(f"Embedding batch of {len(positions)} inputs failed ({e}), retrying individually")
+                for i in positions:
+                    try:
+                        embeddings[i] = self.get_embedding(texts[i])
+                    except Exception as item_error:
+                        errors[i] = str(item_error)
+        
+        logger.info(f"Embedded {len(texts) - len(errors)}/{len(texts)} texts ({len(cached)} from cache)")
+        return embeddings, errors
+    
+    def create_chunk_id(self, doc_name: str, chunk_hash: str, occurrence: int = 0) -> str:
+        """Create content-addressed ID for a document chunk
+        
+        The ID depends on the chunk text rather than its position, so an edit
+        early in a document does not change the IDs of later, unchanged chunks.
+        occurrence disambiguates identical chunks within the same document.
+        """
+        content = f"{doc_name}:{chunk_hash}:{occurrence}"
         return hashlib.md5(content.encode()).hexdigest()
     
     def get_namespace_from_filename(self, filename: str) -> str:
@@ -173,195 +404,1021 @@ class DocumentRAG:
         namespace = name.replace(" ", "_").replace("-", "_").lower()
         return namespace
     
-    def process_document(self, file_path: str) -> Dict[str, Any]:
-        """Process a single document and return metadata"""
+    def hash_file(self, file_path: str) -> str:
+        """Compute SHA-256 of a file without loading it all into memory"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        """Local index manifest, reloaded if another process (CLI ingestion) has written it since it was read"""
+        with self._manifest_lock:
+            stamp = self._manifest_file_stamp()
+            if stamp != self._manifest_stamp:
+                self._manifest_stamp = stamp
+                self._manifest = self._load_manifest()
+            return self._manifest
+    
+    def _manifest_file_stamp(self):
+        try:
+            return self.manifest_path.stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Load the local index manifest (file and chunk hashes of indexed documents)"""
+        try:
+            if self.manifest_path.exists():
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read manifest {self.manifest_path}, starting fresh: {e}")
+        return {"version": 1, "files": {}}
+    
+    def _save_manifest(self):
+        """Write the manifest atomically so an interrupted run cannot corrupt it"""
+        with self._manifest_lock:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                # The copy in memory, which callers have just changed; reading the property could reload it
+                json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_stamp = self._manifest_file_stamp()
+    
+    def plan_document_update(self, file_path: str, chunks: List[str], force: bool = False,
+                             namespace: Optional[str] = None,
+                             chunk_metadata: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Compare a document's chunks with the manifest and work out what to change
+        
+        Args:
+            file_path: Document path, the manifest key
+            chunks: Chunk texts of the new version, in order
+            force: Re-embed every chunk
+            namespace: Shared namespace to index into instead of the document's own
+            chunk_metadata: Extra metadata per chunk, stored on its vector
+        
+        Returns:
+            Plan dict with the chunk records of the new version and the records
+            to embed, the records whose position metadata must be updated, the
+            vector IDs to delete, and whether the namespace must be reset first.
+        """
+        filename = os.path.basename(file_path)
+        shared = namespace is not None
+        namespace = namespace or self.get_namespace_from_filename(filename)
+        entry = self.manifest["files"].get(file_path)
+        previous = entry.get("chunks", {}) if entry else {}
+        
+        # Vectors from another embedding model or dimension cannot be reused
+        if entry and entry.get("embedding", LEGACY_SIGNATURE) != self.embedding_backend.signature:
+            logger.info(f"{filename} was embedded with {entry.get('embedding', LEGACY_SIGNATURE)}, re-embedding")
+            force = True
+        
+        if shared:
+            # Other documents live in a shared namespace, so it is never cleared;
+            # this document's old vectors are deleted by ID instead
+            reset_namespace = False
+            existing = {} if force else previous
+        else:
+            # Without a manifest entry the namespace may hold vectors with unknown
+            # (e.g. legacy positional) IDs, so it is cleared and fully re-indexed
+            reset_namespace = force or entry is None
+            existing = previous = {} if reset_namespace else previous
+        
+        records = []
+        occurrences: Dict[str, int] = {}
+        for i, chunk in enumerate(chunks):
+            metadata = chunk_metadata[i] if chunk_metadata else {}
+            # Metadata is part of the hash so a relabelled chunk gets a new vector
+            content = chunk + (json.dumps(metadata, sort_keys=True, ensure_ascii=False) if metadata else "")
+            chunk_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            occurrence = occurrences.get(chunk_hash, 0)
+            occurrences[chunk_hash] = occurrence + 1
+            records.append({
+                "id": self.create_chunk_id(filename, chunk_hash, occurrence),
+                "hash": chunk_hash,
+                "chunk_index": i,
+                "text": chunk,
+                "metadata": metadata,
+            })
+        
+        new_ids = {record["id"] for record in records}
+        to_embed = [record for record in records if record["id"] not in existing]
+        to_update = [
+            record for record in records
+            if record["id"] in existing and (
+                existing[record["id"]].get("chunk_index") != record["chunk_index"]
+                or entry.get("total_chunks") != len(records)
+            )
+        ]
+        to_delete = [vector_id for vector_id in previous if vector_id not in new_ids]
+        
+        return {
+            "file_path": file_path,
+            "filename": filename,
+            "namespace": namespace,
+            "shared": shared,
+            "records": records,
+            "to_embed": to_embed,
+            "to_update": to_update,
+            "to_delete": to_delete,
+            "reset_namespace": reset_namespace,
+        }
+    
+    def chunk_metadata(self, plan: Dict[str, Any], record: Dict[str, Any]) -> Dict[str, Any]:
+        """Metadata stored with a chunk record, apart from its text"""
+        metadata = {
+            "document_name": plan["filename"],
+            "chunk_index": record["chunk_index"],
+            "total_chunks": len(plan["records"]),
+            "file_path": plan["file_path"],
+            "namespace": plan["namespace"]
+        }
+        metadata.update(record.get("metadata") or {})
+        return metadata
+    
+    def build_vector(self, plan: Dict[str, Any], record: Dict[str, Any], embedding: List[float]) -> Dict[str, Any]:
+        """
+        Build the Pinecone vector for a chunk record
+        
+        The chunk text, file path and position are kept in the chunk store, not
+        in the vector metadata, so query responses stay small and a chunk that
+        moves within its document needs no index update.
+        """
+        metadata = {
+            key: value for key, value in self.chunk_metadata(plan, record).items()
+            if key not in ("file_path", "chunk_index", "total_chunks")
+        }
+        return {
+            "id": record["id"],
+            "values": embedding,
+            "metadata": metadata
+        }
+    
+    def commit_document(self, plan: Dict[str, Any], file_hash: Optional[str], indexed_ids: set) -> None:
+        """
+        Record the indexed state of a document in the manifest
+        
+        Only chunks that are actually in the index are recorded. If some chunks
+        failed, file_hash is stored as None so the next run revisits the file.
+        """
+        with self._manifest_lock:
+            self.manifest["files"][plan["file_path"]] = {
+                "namespace": plan["namespace"],
+                "shared": plan.get("shared", False),
+                "embedding": self.embedding_backend.signature,
+                "file_hash": file_hash,
+                "total_chunks": len(plan["records"]),
+                "indexed_at": datetime.now(timezone.utc).isoformat(),
+                "chunks": {
+                    record["id"]: {"hash": record["hash"], "chunk_index": record["chunk_index"]}
+                    for record in plan["records"] if record["id"] in indexed_ids
+                },
+            }
+            self._save_manifest()
+    
+    def _batch_vectors(self, vectors: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split vectors into batches bounded by vector count and serialized request size"""
+        batches = []
+        current: List[Dict[str, Any]] = []
+        current_bytes = 0
+        # Leave room for the request envelope (namespace, JSON framing)
+        byte_budget = self.upsert_max_request_bytes - 1024
+        
+        for vector in vectors:
+            vector_bytes = len(json.dumps(vector, ensure_ascii=False).encode("utf-8")) + 1
+            if current and (
+                current_bytes + vector_bytes > byte_budget
+                or len(current) >= self.upsert_batch_size
+            ):
+                batches.append(current)
+                current = []
+                current_bytes = 0
+            current.append(vector)
+            current_bytes += vector_bytes
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _upsert_with_retry(self, batch: List[Dict[str, Any]], namespace: str) -> Dict[str, Any]:
+        """Upsert one batch, retrying with exponential backoff and jitter"""
+        error = None
+        for attempt in range(1, self.upsert_max_retries + 1):
+            try:
+                self.index.upsert(vectors=batch, namespace=namespace)
+                return {"status": "success", "attempts": attempt}
+            except Exception as e:
+                error = e
+                if attempt < self.upsert_max_retries:
+                    delay = self.upsert_backoff_seconds * (2 ** (attempt - 1)) * (1 + random.random() * 0.1)
+                    logger.warning(f"Upsert of {len(batch)} vectors to {namespace} failed "
+                                   f"(attempt {attempt}/{self.upsert_max_retries}), retrying in {delay:.1f}s: {e}")
+                    time.sleep(delay)
+        return {"status": "failed", "attempts": self.upsert_max_retries, "error": str(error)}
+    
+    def _spool_pending_upserts(self, vectors: List[Dict[str, Any]], namespace: str) -> None:
+        """Keep vectors of a failed upsert on disk so they are retried, not re-embedded"""
+        with self._manifest_lock:
+            self.pending_upserts_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.pending_upserts_path, "a", encoding="utf-8") as f:
+                for vector in vectors:
+                    f.write(json.dumps({
+                        "namespace": namespace,
+                        "embedding": self.embedding_backend.signature,
+                        "vector": vector
+                    }, ensure_ascii=False) + "\n")
+    
+    def upsert_vectors(self, vectors: List[Dict[str, Any]], namespace: str, spool_failures: bool = True) -> List[Dict[str, Any]]:
+        """
+        Upsert vectors in size-aware batches with retries
+        
+        Args:
+            vectors: Pinecone vectors (id, values, metadata)
+            namespace: Target namespace
+            spool_failures: Save batches that still fail after all retries to
+                the pending-upserts file, to be retried by flush_pending_upserts
+        
+        Returns:
+            One result dict per batch with its size, attempts and status
+        """
+        results = []
+        for i, batch in enumerate(self._batch_vectors(vectors)):
+            result = self._upsert_with_retry(batch, namespace)
+            result.update({"batch": i, "vectors": len(batch), "namespace": namespace})
+            
+            if result["status"] == "failed":
+                logger.error(f"Upsert batch {i} ({len(batch)} vectors) to {namespace} failed: {result['error']}")
+                if spool_failures:
+                    self._spool_pending_upserts(batch, namespace)
+                    result["status"] = "pending"
+            results.append(result)
+        
+        upserted = sum(r["vectors"] for r in results if r["status"] == "success")
+        logger.info(f"Upserted {upserted}/{len(vectors)} vectors to {namespace} in {len(results)} batches")
+        return results
+    
+    def flush_pending_upserts(self) -> Dict[str, int]:
+        """Retry upserts that failed in earlier runs; vectors that still fail stay pending"""
+        with self._manifest_lock:
+            if not self.pending_upserts_path.exists():
+                return {"upserted": 0, "pending": 0}
+            by_namespace: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            with open(self.pending_upserts_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        # Vectors from another embedding model are re-embedded instead
+                        if entry.get("embedding", LEGACY_SIGNATURE) != self.embedding_backend.signature:
+                            continue
+                        # A later entry for the same ID supersedes earlier ones
+                        by_namespace.setdefault(entry["namespace"], {})[entry["vector"]["id"]] = entry["vector"]
+            self.pending_upserts_path.unlink()
+        
+        upserted = 0
+        pending = 0
+        for namespace, vectors in by_namespace.items():
+            for result in self.upsert_vectors(list(vectors.values()), namespace):
+                if result["status"] == "success":
+                    upserted += result["vectors"]
+                else:
+                    pending += result["vectors"]
+        
+        logger.info(f"Flushed pending upserts: {upserted} upserted, {pending} still pending")
+        return {"upserted": upserted, "pending": pending}
+    
+    def unchanged_result(self, file_path: str, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Return an "unchanged" result if the file is indexed with this exact hash"""
+        entry = self.manifest["files"].get(file_path)
+        if not entry or entry.get("file_hash") != file_hash:
+            return None
+        if entry.get("embedding", LEGACY_SIGNATURE) != self.embedding_backend.signature:
+            return None
+        # Documents indexed before the lexical index or chunk store existed are planned
+        # again to build them; their vectors are unchanged, so nothing is re-embedded
+        if entry.get("chunks") and not (
+            self.lexical_index.has_source(entry.get("namespace"), file_path)
+            and self.chunk_store.has_source(entry.get("namespace"), file_path)
+        ):
+            return None
+        return {
+            "status": "unchanged",
+            "filename": os.path.basename(file_path),
+            "namespace": entry.get("namespace"),
+            "chunks_processed": len(entry.get("chunks", {})),
+            "total_chunks": entry.get("total_chunks", 0)
+        }
+    
+    def prepare_namespace(self, plan: Dict[str, Any]) -> None:
+        """
+        Clear the document's namespace when the plan re-indexes it from scratch,
+        and store its chunks so their text is available as soon as vectors are upserted
+        """
+        if plan["reset_namespace"]:
+            try:
+                self.index.delete(delete_all=True, namespace=plan["namespace"])
+            except Exception as e:
+                # A namespace that was never created cannot be deleted
+                logger.info(f"Namespace {plan['namespace']} not cleared: {e}")
+            self.chunk_store.drop_namespace(plan["namespace"])
+        
+        try:
+            self.chunk_store.put_many(plan["namespace"], plan["file_path"], [
+                {"id": record["id"], "text": record["text"], "metadata": self.chunk_metadata(plan, record)}
+                for record in plan["records"]
+            ])
+        except Exception as e:
+            # The next run sees the chunks missing from the store and stores them again
+            logger.error(f"Error storing chunks of {plan['filename']}: {e}")
+    
+    def finalize_document(self, plan: Dict[str, Any], file_hash: str, chunks_embedded: int,
+                          chunk_errors: Dict[int, str], upsert_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply deletions for a document whose new vectors are upserted (or
+        spooled as pending), then record it in the manifest and build its result
+        
+        Moved chunks need no index call: positions are only kept in the chunk
+        store, which prepare_namespace has already updated.
+        """
+        filename = plan["filename"]
+        namespace = plan["namespace"]
+        try:
+            if plan["to_delete"]:
+                self.index.delete(ids=plan["to_delete"], namespace=namespace)
+                logger.info(f"Deleted {len(plan['to_delete'])} stale vectors for {filename}")
+                
+        except Exception as e:
+            logger.error(f"Error updating index for {filename}: {e}")
+            return {"status": "failed", "filename": filename, "reason": f"Index update error: {e}"}
+        
+        indexed_ids = {record["id"] for record in plan["records"]} - {
+            record["id"] for record in plan["to_embed"] if record["chunk_index"] in chunk_errors
+        }
+        self.commit_document(plan, None if chunk_errors else file_hash, indexed_ids)
+        self._update_catalogue(namespace)
+        
+        try:
+            self.chunk_store.prune_document(namespace, plan["file_path"], indexed_ids)
+        except Exception as e:
+            logger.error(f"Error pruning stored chunks of {filename}: {e}")
+        
+        # The lexical index mirrors the chunks that are in the vector index
+        try:
+            self.lexical_index.update_document(namespace, plan["file_path"], [
+                {"id": record["id"], "text": record["text"], "metadata": self.chunk_metadata(plan, record)}
+                for record in plan["records"] if record["id"] in indexed_ids
+            ])
+        except Exception as e:
+            logger.error(f"Error updating lexical index for {filename}: {e}")
+        
+        if not indexed_ids:
+            return {"status": "failed", "filename": filename, "reason": "No valid chunks to upsert"}
+        
+        return {
+            "status": "success",
+            "filename": filename,
+            "namespace": namespace,
+            "chunks_processed": len(indexed_ids),
+            "chunks_embedded": chunks_embedded,
+            "chunks_deleted": len(plan["to_delete"]),
+            "total_chunks": len(plan["records"]),
+            "chunk_errors": chunk_errors,
+            "upserts_pending": sum(r["vectors"] for r in upsert_results if r["status"] == "pending"),
+            "upsert_batches": upsert_results
+        }
+    
+    def process_document(self, file_path: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Process a single document incrementally and return metadata
+        
+        Unchanged files are skipped, only new or changed chunks are embedded,
+        moved chunks are repositioned in the chunk store and vanished chunks are deleted.
+        Set force=True to re-index the whole document.
+        """
         try:
             filename = os.path.basename(file_path)
             namespace = self.get_namespace_from_filename(filename)
             
             logger.info(f"Processing document: {filename} -> namespace: {namespace}")
             
+            file_hash = self.hash_file(file_path)
+            unchanged = None if force else self.unchanged_result(file_path, file_hash)
+            if unchanged:
+                logger.info(f"{filename} is unchanged since last indexing, skipping")
+                return unchanged
+            
             # Extract text
             text = self.extract_text_from_docx(file_path)
             if not text:
                 logger.warning(f"No text extracted from {filename}")
-                return {"status": "failed", "reason": "No text extracted"}
+                return {"status": "failed", "filename": filename, "reason": "No text extracted"}
             
             # Chunk text
             chunks = self.chunk_text(text)
             logger.info(f"Created {len(chunks)} chunks for {filename}")
             
-            # Process each chunk
+            plan = self.plan_document_update(file_path, chunks, force=force)
+            logger.info(
+                f"{filename}: {len(plan['to_embed'])} chunks to embed, "
+                f"{len(plan['to_update'])} moved, {len(plan['to_delete'])} to delete"
+            )
+            self.prepare_namespace(plan)
+            
+            # Embed only new or changed chunks, keeping chunk order
+            embeddings, embedding_errors = self.get_embeddings([record["text"] for record in plan["to_embed"]])
+            
             vectors_to_upsert = []
+            chunk_errors = {}
             
-            for i, chunk in enumerate(chunks):
-                try:
-                    # Get embedding
-                    embedding = self.get_embedding(chunk)
-                    
-                    # Create unique ID
-                    doc_id = self.create_document_id(filename, i)
-                    
-                    # Prepare metadata
-                    metadata = {
-                        "document_name": filename,
-                        "chunk_index": i,
-                        "chunk_text": chunk,
-                        "total_chunks": len(chunks),
-                        "file_path": file_path,
-                        "namespace": namespace
-                    }
-                    
-                    # Prepare vector for upsert
-                    vector = {
-                        "id": doc_id,
-                        "values": embedding,
-                        "metadata": metadata
-                    }
-                    
-                    vectors_to_upsert.append(vector)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing chunk {i} of {filename}: {e}")
+            for position, (record, embedding) in enumerate(zip(plan["to_embed"], embeddings)):
+                if embedding is None:
+                    error = embedding_errors.get(position)
+                    chunk_errors[record["chunk_index"]] = error
+                    logger.error(f"Error processing chunk {record['chunk_index']} of {filename}: {error}")
                     continue
+                vectors_to_upsert.append(self.build_vector(plan, record, embedding))
             
-            # Upsert vectors to Pinecone with namespace
-            if vectors_to_upsert:
-                try:
-                    self.index.upsert(
-                        vectors=vectors_to_upsert,
-                        namespace=namespace
-                    )
-                    logger.info(f"Successfully upserted {len(vectors_to_upsert)} vectors for {filename}")
-                    
-                    return {
-                        "status": "success",
-                        "filename": filename,
-                        "namespace": namespace,
-                        "chunks_processed": len(vectors_to_upsert),
-                        "total_chunks": len(chunks)
-                    }
-                    
-                except Exception as e:
-                    logger.error(f"Error upserting vectors for {filename}: {e}")
-                    return {"status": "failed", "reason": f"Upsert error: {e}"}
-            else:
-                return {"status": "failed", "reason": "No valid chunks to upsert"}
+            # Upsert vectors to Pinecone with namespace; failed batches are kept as pending
+            upsert_results = self.upsert_vectors(vectors_to_upsert, namespace)
+            
+            return self.finalize_document(plan, file_hash, len(vectors_to_upsert), chunk_errors, upsert_results)
                 
         except Exception as e:
             logger.error(f"Error processing document {file_path}: {e}")
-            return {"status": "failed", "reason": str(e)}
+            return {"status": "failed", "filename": os.path.basename(file_path), "reason": str(e)}
     
-    def process_all_documents(self, folder_path: str = "classification_documents") -> List[Dict[str, Any]]:
-        """Process all .docx documents in the specified folder"""
+    def remove_vanished_documents(self, folder_path: str, present_files: List[str]) -> List[str]:
+        """Remove indexed documents that no longer exist in folder_path from the index"""
+        folder = Path(folder_path)
+        removed = []
+        for file_path in list(self.manifest["files"]):
+            if Path(file_path).parent == folder and file_path not in present_files:
+                entry = self.manifest["files"][file_path]
+                if entry.get("shared"):
+                    deleted = self.delete_document(file_path)
+                else:
+                    deleted = self.delete_namespace(entry["namespace"])
+                if deleted:
+                    removed.append(file_path)
+        return removed
+    
+    def _ingest_folder(self, folder_path: str, force: bool = False, extractor=None,
+                       namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Run the ingestion pipeline over the .docx files of a folder"""
+        folder_path_obj = Path(folder_path)
+        if not folder_path_obj.exists():
+            logger.error(f"Folder {folder_path} does not exist")
+            return []
+        
+        # Find all .docx files, skipping Word lock files ("~$name.docx")
+        docx_files = [f for f in folder_path_obj.glob("*.docx") if not f.name.startswith("~$")]
+        logger.info(f"Found {len(docx_files)} .docx files to process")
+        
+        # Retry upserts that failed last time before producing new ones
+        self.flush_pending_upserts()
+        
+        # Extraction, embedding and upserts run as concurrent pipeline stages
+        pipeline = IngestionPipeline(self, extractor=extractor, namespace=namespace)
+        results = pipeline.run([str(f) for f in docx_files], force=force)
+        
+        removed = self.remove_vanished_documents(folder_path, [str(f) for f in docx_files])
+        if removed:
+            logger.info(f"Removed {len(removed)} vanished documents from the index: {removed}")
+        
+        return results
+    
+    def process_all_documents(self, folder_path: str = "classification_documents", force: bool = False) -> List[Dict[str, Any]]:
+        """Process all .docx documents in the specified folder, re-indexing only what changed"""
         try:
-            folder_path_obj = Path(folder_path)
-            if not folder_path_obj.exists():
-                logger.error(f"Folder {folder_path} does not exist")
-                return []
+            return self._ingest_folder(folder_path, force=force)
             
-            # Find all .docx files
-            docx_files = list(folder_path_obj.glob("*.docx"))
-            logger.info(f"Found {len(docx_files)} .docx files to process")
+        except Exception as e:
+            logger.error(f"Error processing documents: {e}")
+            return []
+    
+    def process_exemplar_documents(self, folder_path: str = "docs", force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Index the answers of prior applications in folder_path as exemplars
+        
+        Each answer becomes one vector in the shared exemplar namespace, tagged
+        with the form_structure section and question it answers.
+        """
+        try:
+            return self._ingest_folder(
+                folder_path, force=force, extractor=extract_exemplar_units, namespace=self.exemplar_namespace
+            )
             
-            results = []
+        except Exception as e:
+            logger.error(f"Error processing exemplar documents: {e}")
+            return []
+    
+    def _format_result(self, result_id: str, score: float, metadata: Dict[str, Any], namespace: str,
+                       text: str) -> Dict[str, Any]:
+        """Build a search result dict from a match's text and metadata"""
+        return {
+            "id": result_id,
+            "score": score,
+            "text": text,
+            "document_name": metadata.get("document_name", ""),
+            "chunk_index": metadata.get("chunk_index", 0),
+            "namespace": metadata.get("namespace", namespace),
+            "metadata": metadata
+        }
+    
+    def _query_namespace(self, query_embedding: List[float], namespace: str, top_k: int,
+                         metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Query one namespace with a precomputed embedding, best match first"""
+        search_kwargs = {
+            "vector": query_embedding,
+            "top_k": top_k,
+            "include_metadata": False,  # Text and metadata come from the chunk store
+            "namespace": namespace
+        }
+        if metadata_filter:
+            search_kwargs["filter"] = metadata_filter
+        results = self.index.query(**search_kwargs)
+        chunks = self._get_chunks(namespace, [match.id for match in results.matches])
+        return [
+            self._format_result(match.id, match.score, chunks[match.id]["metadata"], namespace,
+                                text=chunks[match.id]["text"])
+            for match in results.matches if match.id in chunks
+        ]
+    
+    def _get_chunks(self, namespace: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Text and metadata of chunks by vector ID
+        
+        Read from the chunk store; vectors it does not have are fetched from
+        the index. Only vectors indexed before the chunk store existed carry
+        their text there; chunks without text are left out, so hits never
+        reach a prompt empty.
+        """
+        chunks = self.chunk_store.get_many(namespace, ids)
+        missing = [vector_id for vector_id in ids if vector_id not in chunks]
+        if missing:
+            fetched = self.index.fetch(ids=missing, namespace=namespace)
+            without_text = 0
+            for vector_id, vector in (fetched.vectors or {}).items():
+                metadata = dict(vector.metadata or {})
+                text = metadata.pop("chunk_text", "")
+                if text:
+                    chunks[vector_id] = {"text": text, "metadata": metadata}
+                else:
+                    without_text += 1
+            logger.info(f"Fetched {len(missing)} chunks missing from the chunk store for namespace {namespace}")
+            if without_text:
+                logger.warning(f"{without_text} chunks of namespace {namespace} are neither in the chunk store "
+                               f"({self.chunk_store.path}) nor carry text in the index and were dropped; "
+                               f"re-ingest the documents to rebuild the chunk store")
+        return chunks
+    
+    def _lexical_query(self, query: str, namespace: str, top_k: int,
+                       metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """BM25 search in one namespace's lexical index, best match first"""
+        return [
+            self._format_result(hit["id"], hit["score"], hit["metadata"], namespace, text=hit["text"])
+            for hit in self.lexical_index.search(namespace, query, top_k, metadata_filter)
+        ]
+    
+    def fuse_rankings(self, rankings: Dict[str, List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Combine rankings with reciprocal rank fusion
+        
+        Each result scores sum(1 / (rrf_k + rank)) over the rankings it appears
+        in, scaled so that first place in every non-empty ranking gives 1.0.
+        The original scores are kept as "<ranking>_score". Rankings may span
+        several namespaces; results are told apart by namespace and ID.
+        """
+        fused: Dict[tuple, Dict[str, Any]] = {}
+        for name, ranking in rankings.items():
+            for rank, result in enumerate(ranking, 1):
+                entry = fused.setdefault((result.get("namespace"), result["id"]), dict(result, score=0.0))
+                entry["score"] += 1.0 / (self.rrf_k + rank)
+                entry[f"{name}_score"] = result["score"]
+        
+        best_possible = sum(1 for ranking in rankings.values() if ranking) / (self.rrf_k + 1)
+        for entry in fused.values():
+            entry["score"] /= best_possible
+        return heapq.nlargest(top_k, fused.values(), key=lambda result: result["score"])
+    
+    def merge_results(self, result_lists: List[List[Dict[str, Any]]],
+                      max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Merge the results of several namespaces into one ranking
+        
+        Hybrid scores are scaled per namespace, so every namespace's top hit
+        scores 1.0 and cannot be compared across namespaces. Hybrid results are
+        therefore fused again in one pass over all namespaces, from the raw
+        vector and BM25 scores they keep. Vector and lexical results are
+        merged on their raw scores.
+        
+        Args:
+            result_lists: Results of each namespace
+            max_results: Optional limit on the merged results
+        
+        Returns:
+            Results from all namespaces, best score first
+        """
+        results = [result for namespace_results in result_lists for result in namespace_results]
+        limit = len(results) if max_results is None else max_results
+        if sum(1 for namespace_results in result_lists if namespace_results) <= 1:
+            return sorted(results, key=lambda result: -result["score"])[:limit]
+        if not any("vector_score" in result or "lexical_score" in result for result in results):
+            return heapq.nlargest(limit, results, key=lambda result: result["score"])
+        
+        # Results answered lexically (fallback) only carry their BM25 score
+        vector = [dict(result, score=result["vector_score"]) for result in results if "vector_score" in result]
+        lexical = [
+            dict(result, score=result.get("lexical_score", result["score"])) for result in results
+            if "lexical_score" in result or "vector_score" not in result
+        ]
+        return self.fuse_rankings({
+            "vector": sorted(vector, key=lambda result: -result["score"]),
+            "lexical": sorted(lexical, key=lambda result: -result["score"])
+        }, limit)
+    
+    def _search_namespace(self, query: str, query_embedding: Optional[List[float]], namespace: str, top_k: int,
+                          mode: str, metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Search one namespace in vector, lexical or hybrid mode"""
+        if mode == "lexical" or query_embedding is None:
+            return self._lexical_query(query, namespace, top_k, metadata_filter)
+        mismatch = self.embedding_mismatch(namespace)
+        if mismatch:
+            # Vectors from another embedding space would match meaninglessly
+            if mode == "vector":
+                raise ValueError(mismatch)
+            logger.error(f"{mismatch}; searching it lexically")
+            return self._lexical_query(query, namespace, top_k, metadata_filter)
+        if mode == "vector":
+            return self._query_namespace(query_embedding, namespace, top_k, metadata_filter)
+        
+        candidates = top_k * self.hybrid_candidates
+        return self.fuse_rankings({
+            "vector": self._query_namespace(query_embedding, namespace, candidates, metadata_filter),
+            "lexical": self._lexical_query(query, namespace, candidates, metadata_filter)
+        }, top_k)
+    
+    def embedding_mismatch(self, namespace: str) -> Optional[str]:
+        """
+        Describe why namespace cannot be searched with the current embedding backend
+        
+        Returns:
+            An error message if any of the namespace's documents were indexed with
+            another embedding signature (see the manifest), otherwise None
+        """
+        with self._manifest_lock:
+            signatures = {
+                entry.get("embedding", LEGACY_SIGNATURE) for entry in self.manifest["files"].values()
+                if entry.get("namespace") == namespace
+            }
+        current = self.embedding_backend.signature
+        if signatures - {current}:
+            return (f"Namespace {namespace} was indexed with {', '.join(sorted(signatures - {current}))} "
+                    f"but queries are embedded with {current}; re-ingest the documents")
+        return None
+    
+    def embed_query(self, query: str) -> Optional[List[float]]:
+        """Embed a search query, or return None if the backend fails or is too slow (see embed_queries)"""
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed search queries in one batch, waiting at most embedding_timeout_seconds
+        
+        Queries that are empty or could not be embedded get None. After a
+        failure, queries are not embedded for embedding_retry_seconds so every
+        search does not wait for the timeout again. Time spent waiting for a
+        worker of the embedding pool does not count towards the timeout.
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(queries)
+        positions = [i for i, query in enumerate(queries) if query.strip()]
+        if not positions or time.monotonic() < self._embedding_unavailable_until:
+            return embeddings
+        started = threading.Event()
+        
+        def embed():
+            started.set()
+            return self.get_embeddings([queries[i] for i in positions])
+        
+        future = self._get_embedding_pool().submit(embed)
+        if not started.wait(self.search_queue_timeout_seconds) and future.cancel():
+            # A busy pool says nothing about the backend, so later searches still embed
+            logger.warning(f"No worker free to embed queries within {self.search_queue_timeout_seconds}s, "
+                           f"searching lexically")
+            return embeddings
+        try:
+            batch_embeddings, errors = future.result(timeout=self.embedding_timeout_seconds)
+            for i, embedding in zip(positions, batch_embeddings):
+                embeddings[i] = embedding
+            if not errors:
+                return embeddings
+            logger.warning(f"{len(errors)} of {len(positions)} query embeddings failed, searching them lexically")
+        except FutureTimeoutError:
+            logger.warning(f"Query embedding took over {self.embedding_timeout_seconds}s, searching lexically")
+        except Exception as e:
+            logger.warning(f"Query embedding failed ({e}), searching lexically")
+        self._embedding_unavailable_until = time.monotonic() + self.embedding_retry_seconds
+        return embeddings
+    
+    def _get_search_pool(self) -> ThreadPoolExecutor:
+        """Thread pool for namespace queries, created on first use and shared by all searches"""
+        if self._search_pool is None:
+            with self._search_pool_lock:
+                if self._search_pool is None:
+                    self._search_pool = ThreadPoolExecutor(max_workers=self.search_concurrency,
+                                                           thread_name_prefix="rag-search")
+        return self._search_pool
+    
+    def _get_embedding_pool(self) -> ThreadPoolExecutor:
+        """Thread pool for query embeddings, created on first use and shared by all searches"""
+        if self._embedding_pool is None:
+            with self._search_pool_lock:
+                if self._embedding_pool is None:
+                    self._embedding_pool = ThreadPoolExecutor(max_workers=self.embedding_concurrency,
+                                                              thread_name_prefix="rag-embed")
+        return self._embedding_pool
+    
+    def _wait_for_searches(self, futures: Dict[Any, Any], started: Dict[Any, float],
+                           submitted: float) -> Dict[Any, str]:
+        """
+        Wait for namespace queries, each with its own deadline
+        
+        A query gets search_timeout_seconds from the moment it starts running;
+        one still waiting for a worker after search_queue_timeout_seconds is
+        cancelled. A slow namespace therefore does not shorten the others' time.
+        
+        Returns:
+            Why each query that timed out did not finish, by key
+        """
+        timed_out = {}
+        pending = dict(futures)
+        while pending:
+            now = time.monotonic()
+            deadlines = {}
+            for key, future in list(pending.items()):
+                if future.done():
+                    del pending[key]
+                    continue
+                start = started.get(key)
+                deadline = (start + self.search_timeout_seconds if start is not None
+                            else submitted + self.search_queue_timeout_seconds)
+                # A query that starts between the check and cancel() keeps running with its own deadline
+                if now >= deadline and (start is not None or future.cancel()):
+                    timed_out[key] = (f"timed out after {self.search_timeout_seconds}s" if start is not None
+                                      else f"found no free worker within {self.search_queue_timeout_seconds}s")
+                    del pending[key]
+                elif now < deadline:
+                    deadlines[key] = deadline
+            if pending:
+                next_deadline = min(deadlines.values(), default=now)
+                wait(list(pending.values()), timeout=max(next_deadline - now, 0.01), return_when=FIRST_COMPLETED)
+        return timed_out
+    
+    def _run_searches(self, queries: List[str], namespaces: List[str], top_k: int,
+                      quotas: Optional[Dict[str, int]], query_embeddings: Optional[List[Optional[List[float]]]],
+                      mode: str, metadata_filter: Optional[Dict[str, Any]]) -> List[List[List[Dict[str, Any]]]]:
+        """
+        Search every query in every namespace with one concurrent fan-out
+        
+        (query, namespace) pairs in the retrieval cache are not searched, and
+        only queries with at least one uncached pair are embedded, in one batch.
+        
+        Returns:
+            For each query, the result lists of the namespaces that answered in time
+        """
+        index_version = self.index_version
+        per_query: List[List[List[Dict[str, Any]]]] = [[] for _ in queries]
+        embeddings = list(query_embeddings) if query_embeddings else [None] * len(queries)
+        
+        misses = {}
+        for position, query in enumerate(queries):
+            for namespace in dict.fromkeys(namespaces):
+                namespace_top_k = (quotas or {}).get(namespace, top_k)
+                if namespace_top_k <= 0:
+                    continue
+                key = RetrievalCache.make_key(namespace, query, namespace_top_k, mode, index_version, metadata_filter)
+                cached = self.retrieval_cache.get(key)
+                if cached is None:
+                    misses[(position, namespace)] = (key, namespace_top_k)
+                else:
+                    per_query[position].append(cached)
+        if not misses:
+            return per_query
+        
+        to_embed = sorted({position for position, _ in misses if embeddings[position] is None})
+        if mode == "vector" and to_embed:
+            vector_embeddings, errors = self.get_embeddings([queries[i] for i in to_embed])
+            for position, embedding in zip(to_embed, vector_embeddings):
+                embeddings[position] = embedding
+            for error in errors.values():
+                logger.error(f"Error embedding search query: {error}")
+        elif mode == "hybrid" and to_embed:
+            # Falls back to lexical search when the embedding is slow or fails
+            for position, embedding in zip(to_embed, self.embed_queries([queries[i] for i in to_embed])):
+                embeddings[position] = embedding
+        
+        pool = self._get_search_pool()
+        futures = {}
+        started: Dict[Tuple[int, str], float] = {}
+        
+        def search(pair, *args):
+            started[pair] = time.monotonic()
+            return self._search_namespace(*args)
+        
+        submitted = time.monotonic()
+        for (position, namespace), (key, namespace_top_k) in misses.items():
+            if mode == "vector" and embeddings[position] is None:
+                continue
+            futures[(position, namespace)] = pool.submit(
+                search, (position, namespace), queries[position], embeddings[position], namespace,
+                namespace_top_k, mode, metadata_filter
+            )
+        
+        # Slow namespaces are skipped, not waited for
+        timed_out = self._wait_for_searches(futures, started, submitted)
+        for (position, namespace), future in futures.items():
+            if (position, namespace) in timed_out:
+                logger.warning(f"Search in namespace {namespace} {timed_out[(position, namespace)]}")
+                continue
+            try:
+                namespace_results = future.result()
+            except Exception as e:
+                logger.error(f"Error searching namespace {namespace}: {e}")
+                continue
+            per_query[position].append(namespace_results)
+            # Lexical fallback results are not what hybrid mode would return, so they are not cached
+            if mode == "lexical" or embeddings[position] is not None:
+                self.retrieval_cache.put(misses[(position, namespace)][0], namespace_results)
+        
+        return per_query
+    
+    def search_namespaces(self, query: str, namespaces: List[str], top_k: int = 3,
+                          quotas: Optional[Dict[str, int]] = None, max_results: Optional[int] = None,
+                          query_embedding: Optional[List[float]] = None, mode: Optional[str] = None,
+                          metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Search several namespaces with one query embedding and concurrent queries
+        
+        Namespaces whose results are in the retrieval cache are not queried, and
+        the query is only embedded if some namespace has to be.
+        
+        Args:
+            query: Search text
+            namespaces: Namespaces to search
+            top_k: Results per namespace, unless set in quotas
+            quotas: Optional per-namespace result limits
+            max_results: Optional limit on the merged results
+            query_embedding: Precomputed embedding of query, if the caller has one
+            mode: "hybrid", "vector" or "lexical" (defaults to search_mode)
+            metadata_filter: Optional Pinecone-style metadata filter
+        
+        Returns:
+            Results from all namespaces, best score first
+        """
+        try:
+            if not namespaces:
+                return []
+            per_namespace = self._run_searches(
+                [query], namespaces, top_k, quotas,
+                [query_embedding] if query_embedding is not None else None,
+                mode or self.search_mode, metadata_filter
+            )[0]
             
-            for file_path in docx_files:
-                logger.info(f"Processing: {file_path}")
-                result = self.process_document(str(file_path))
-                results.append(result)
+            results = self.merge_results(per_namespace, max_results)
             
+            logger.info(f"Found {len(results)} results in {len(per_namespace)} namespaces for query: '{query}'")
             return results
             
         except Exception as e:
-            logger.error(f"Error processing documents: {e}")
+            logger.error(f"Error searching namespaces: {e}")
             return []
     
-    def search_documents(self, query: str, namespace: Optional[str] = None, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Search for relevant document chunks in specific namespace or all namespaces"""
+    def search_queries(self, queries: List[str], namespaces: List[str], top_k: int = 3,
+                       mode: Optional[str] = None,
+                       metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Search several queries over several namespaces at once
+        
+        The queries are embedded in one batch and every (query, namespace)
+        search runs on the shared pool concurrently.
+        
+        Args:
+            queries: Search texts
+            namespaces: Namespaces to search
+            top_k: Results per query and namespace
+            mode: "hybrid", "vector" or "lexical" (defaults to search_mode)
+            metadata_filter: Optional Pinecone-style metadata filter
+        
+        Returns:
+            For each query, {namespace: results best first}
+        """
         try:
-            # Get query embedding
-            query_embedding = self.get_embedding(query)
+            if not queries or not namespaces:
+                return [{} for _ in queries]
+            per_query = self._run_searches(queries, namespaces, top_k, None, None,
+                                           mode or self.search_mode, metadata_filter)
+            rankings = []
+            for namespace_lists in per_query:
+                by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+                for namespace_results in namespace_lists:
+                    for result in namespace_results:
+                        by_namespace.setdefault(result["namespace"], []).append(result)
+                rankings.append(by_namespace)
+            logger.info(f"Searched {len(queries)} queries in {len(namespaces)} namespaces")
+            return rankings
             
+        except Exception as e:
+            logger.error(f"Error searching queries: {e}")
+            return [{} for _ in queries]
+    
+    def search_documents(self, query: str, namespace: Optional[str] = None, top_k: int = 5,
+                         mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Search for relevant document chunks in specific namespace or all namespaces
+        
+        mode is "hybrid" (vector and BM25 ranks fused), "vector" or "lexical";
+        it defaults to the SEARCH_MODE setting.
+        """
+        try:
             # If namespace is specified, search only in that namespace
             if namespace and namespace.strip():
-                search_kwargs = {
-                    "vector": query_embedding,
-                    "top_k": top_k,
-                    "include_metadata": True,
-                    "namespace": namespace
-                }
                 logger.info(f"Searching in namespace: {namespace}")
-                results = self.index.query(**search_kwargs)
-                
-                # Format results
-                formatted_results = []
-                for match in results.matches:
-                    formatted_results.append({
-                        "id": match.id,
-                        "score": match.score,
-                        "text": match.metadata.get("chunk_text", ""),
-                        "document_name": match.metadata.get("document_name", ""),
-                        "chunk_index": match.metadata.get("chunk_index", 0),
-                        "namespace": match.metadata.get("namespace", namespace)
-                    })
-                
-                logger.info(f"Found {len(formatted_results)} results for query: '{query}'")
-                return formatted_results
+                return self.search_namespaces(query, [namespace], top_k=top_k, mode=mode)
             
             else:
-                # Cross-namespace search: search each namespace individually then combine results
+                # Cross-namespace search: concurrent queries over the cached namespace list,
+                # exemplar answers are searched separately
                 logger.info("Searching across all namespaces")
-                all_results = []
-                
-                # Get all available namespaces
-                available_namespaces = self.get_namespaces()
-                
-                # Search in each namespace
-                for ns in available_namespaces:
-                    try:
-                        search_kwargs = {
-                            "vector": query_embedding,
-                            "top_k": top_k,
-                            "include_metadata": True,
-                            "namespace": ns
-                        }
-                        results = self.index.query(**search_kwargs)
-                        
-                        # Add namespace results to combined list
-                        for match in results.matches:
-                            all_results.append({
-                                "id": match.id,
-                                "score": match.score,
-                                "text": match.metadata.get("chunk_text", ""),
-                                "document_name": match.metadata.get("document_name", ""),
-                                "chunk_index": match.metadata.get("chunk_index", 0),
-                                "namespace": match.metadata.get("namespace", ns)
-                            })
-                    except Exception as e:
-                        logger.warning(f"Error searching namespace {ns}: {e}")
-                        continue
-                
-                # Sort all results by score (highest first) and limit to top_k
-                all_results.sort(key=lambda x: x["score"], reverse=True)
-                final_results = all_results[:top_k]
-                
-                logger.info(f"Found {len(final_results)} results for query: '{query}'")
-                return final_results
+                namespaces = [ns for ns in self.get_namespaces() if ns != self.exemplar_namespace]
+                return self.search_namespaces(query, namespaces, top_k=top_k, max_results=top_k, mode=mode)
             
         except Exception as e:
             logger.error(f"Error searching documents: {e}")
             return []
     
-    def get_namespaces(self) -> List[str]:
-        """Get list of available namespaces (document names)"""
+    def _update_catalogue(self, namespace: str) -> None:
+        """Rebuild a namespace's catalogue entry from the manifest after indexing or deletion"""
+        entries = [
+            (file_path, entry) for file_path, entry in self.manifest["files"].items()
+            if entry.get("namespace") == namespace
+        ]
+        if not entries:
+            self.namespace_catalogue.remove(namespace)
+            return
+        
+        if len(entries) == 1:
+            source_file = entries[0][0]
+            content_hash = entries[0][1].get("file_hash")
+        else:
+            # Shared namespace: the folder of its files and a hash over all of them
+            source_file = os.path.commonpath([file_path for file_path, _ in entries])
+            file_hashes = sorted(f"{file_path}:{entry.get('file_hash')}" for file_path, entry in entries)
+            content_hash = hashlib.sha256("\n".join(file_hashes).encode("utf-8")).hexdigest()
+        
+        self.namespace_catalogue.record(
+            namespace,
+            vector_count=sum(len(entry.get("chunks", {})) for _, entry in entries),
+            source_file=source_file,
+            content_hash=content_hash,
+            last_indexed=max(entry.get("indexed_at") or "" for _, entry in entries) or None
+        )
+    
+    @property
+    def index_version(self) -> str:
+        """Changes whenever indexed content, the embedding model or the search mode changes"""
+        return f"{self.namespace_catalogue.version}:{self.embedding_backend.signature}:{self.search_mode}"
+    
+    def get_namespace_catalogue(self) -> Dict[str, Dict[str, Any]]:
+        """Catalogue entries (vector count, source file, content hash, last indexed) by namespace"""
+        self.get_namespaces()  # Re-syncs the catalogue if it is past its TTL
+        return self.namespace_catalogue.entries()
+    
+    def get_namespaces(self, refresh: bool = False) -> List[str]:
+        """
+        Get list of available namespaces (document names)
+        
+        Served from the namespace catalogue, which ingestion and deletion keep
+        up to date; the index stats are only read when the catalogue is older
+        than its TTL or refresh=True.
+        """
+        catalogue = self.namespace_catalogue
+        if not refresh and not catalogue.is_stale() and catalogue.namespaces():
+            return catalogue.namespaces()
+        
         try:
             # Get index statistics to see available namespaces
             stats = self.index.describe_index_stats()
+            catalogue.sync({
+                name: getattr(summary, "vector_count", 0) for name, summary in (stats.namespaces or {}).items()
+            })
             
             # Extract namespace names from stats
             if stats.namespaces:
-                namespaces = list(stats.namespaces.keys())
+                namespaces = catalogue.namespaces()
                 logger.info(f"Found namespaces: {namespaces}")
                 return namespaces
             else:
@@ -379,7 +1436,9 @@ class DocumentRAG:
             
         except Exception as e:
             logger.error(f"Error getting namespaces: {e}")
-            # Fallback: return namespaces based on local files
+            # Fallback: the last known catalogue, then namespaces based on local files
+            if catalogue.namespaces():
+                return catalogue.namespaces()
             try:
                 folder_path = Path("classification_documents")
                 if folder_path.exists():
@@ -395,6 +1454,17 @@ class DocumentRAG:
         try:
             self.index.delete(delete_all=True, namespace=namespace)
             logger.info(f"Deleted namespace: {namespace}")
+            self.namespace_catalogue.remove(namespace)
+            self.lexical_index.drop_namespace(namespace)
+            self.chunk_store.drop_namespace(namespace)
+            
+            # Forget the deleted documents so they are fully re-indexed next time
+            with self._manifest_lock:
+                files = self.manifest["files"]
+                for file_path, entry in list(files.items()):
+                    if entry.get("namespace") == namespace:
+                        del files[file_path]
+                self._save_manifest()
             return True
             
         except Exception as e:
@@ -422,6 +1492,86 @@ class DocumentRAG:
             return ""
 
 
+    def search_exemplars(self, query: str, form_questions: Optional[List[str]] = None,
+                         top_k: int = 3, query_embedding: Optional[List[float]] = None,
+                         mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Search answers from prior applications
+        
+        Args:
+            query: Search text
+            form_questions: Only return answers to these form_structure questions
+            top_k: Number of answers to return
+            query_embedding: Precomputed embedding of query, if the caller has one
+            mode: "hybrid", "vector" or "lexical" (defaults to search_mode)
+        
+        Returns:
+            List of exemplar answers with their question and source application
+        """
+        try:
+            metadata_filter = {"form_question": {"$in": list(form_questions)}} if form_questions else None
+            results = self.search_namespaces(
+                query, [self.exemplar_namespace], top_k=top_k,
+                query_embedding=query_embedding, mode=mode, metadata_filter=metadata_filter
+            )
+            
+            return [
+                {
+                    "id": result["id"],
+                    "score": result["score"],
+                    "text": result["text"],
+                    "form_section": result["metadata"].get("form_section", ""),
+                    "form_question": result["metadata"].get("form_question", ""),
+                    "project_name": result["metadata"].get("project_name", ""),
+                    "application_id": result["metadata"].get("application_id", ""),
+                    "namespace": self.exemplar_namespace
+                }
+                for result in results
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error searching exemplars: {e}")
+            return []
+    
+    def delete_document(self, file_path: str) -> bool:
+        """Delete a document's vectors from a shared namespace by ID"""
+        try:
+            entry = self.manifest["files"].get(file_path)
+            if not entry:
+                return False
+            vector_ids = list(entry.get("chunks", {}))
+            # Pinecone accepts at most 1000 IDs per delete request
+            for start in range(0, len(vector_ids), 1000):
+                self.index.delete(ids=vector_ids[start:start + 1000], namespace=entry["namespace"])
+            logger.info(f"Deleted {len(vector_ids)} vectors of {file_path} from {entry['namespace']}")
+            
+            with self._manifest_lock:
+                self.manifest["files"].pop(file_path, None)
+                self._save_manifest()
+            self._update_catalogue(entry["namespace"])
+            self.lexical_index.remove_document(entry["namespace"], file_path)
+            self.chunk_store.delete_document(entry["namespace"], file_path)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting document {file_path}: {e}")
+            return False
+    
+# One DocumentRAG per process, shared by all Streamlit sessions and threads
+_shared_rag: Optional[DocumentRAG] = None
+_shared_rag_lock = threading.Lock()
+
+
+def get_rag() -> DocumentRAG:
+    """Return the process-wide DocumentRAG, creating it on first use"""
+    global _shared_rag
+    if _shared_rag is None:
+        with _shared_rag_lock:
+            if _shared_rag is None:
+                _shared_rag = DocumentRAG()
+    return _shared_rag
+
+
 # Helper function for easy integration with other parts of the application
 def search_classification_docs(query: str, document_section: Optional[str] = None) -> str:
     """
@@ -435,7 +1585,7 @@ def search_classification_docs(query: str, document_section: Optional[str] = Non
         Combined relevant content from documents
     """
     try:
-        rag = DocumentRAG()
+        rag = get_rag()
         
         # Determine namespace if document_section is provided
         namespace = None
@@ -458,27 +1608,50 @@ def search_classification_docs(query: str, document_section: Optional[str] = Non
         return ""
 
 
+def show_processing_results(results: List[Dict[str, Any]]):
+    """Show the per-document results of an ingestion run"""
+    st.subheader("Processing Results:")
+    for result in results:
+        if result["status"] == "success":
+            st.success(f"✅ {result['filename']}: {result['chunks_processed']} chunks indexed, {result['chunks_embedded']} embedded")
+            if result.get("upserts_pending"):
+                st.warning(f"⚠️ {result['filename']}: {result['upserts_pending']} vectors pending upload, they will be retried on the next run")
+        elif result["status"] == "unchanged":
+            st.info(f"⏭️ {result['filename']}: unchanged, {result['chunks_processed']} chunks already indexed")
+        else:
+            st.error(f"❌ {result.get('filename', 'Unknown')}: {result.get('reason', 'Unknown error')}")
+
+
 def main():
     """Main function for testing the RAG system"""
     st.title("Document RAG System")
     
     try:
         # Initialize RAG system
-        rag = DocumentRAG()
+        rag = get_rag()
         
         st.success("RAG system initialized successfully!")
         
+        # Connection status
+        with st.expander("🔌 Connection"):
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Check connection"):
+                    st.json(rag.health_check(check_embeddings=True))
+            with col2:
+                if st.button("Reconnect"):
+                    rag.reconnect()
+                    st.success("Clients will reconnect on next use")
+        
         # Process documents button
         if st.button("Process All Documents"):
             with st.spinner("Processing documents..."):
-                results = rag.process_all_documents()
-                
-                st.subheader("Processing Results:")
-                for result in results:
-                    if result["status"] == "success":
-                        st.success(f"✅ {result['filename']}: {result['chunks_processed']} chunks processed")
-                    else:
-                        st.error(f"❌ {result.get('filename', 'Unknown')}: {result.get('reason', 'Unknown error')}")
+                show_processing_results(rag.process_all_documents())
+        
+        # Index answers from prior applications in docs/
+        if st.button("Process Prior Applications"):
+            with st.spinner("Processing prior applications..."):
+                show_processing_results(rag.process_exemplar_documents())
         
         # Search interface
         st.subheader("Search Documents")
@@ -513,11 +1686,19 @@ def main():
         else:
             st.info("🔍 Searching across **all documents**")
         
+        search_mode = st.radio(
+            "Search mode:",
+            options=["hybrid", "vector", "lexical"],
+            index=["hybrid", "vector", "lexical"].index(rag.search_mode),
+            horizontal=True,
+            help="Hybrid fuses semantic (vector) and exact-term (BM25) rankings"
+        )
+        
         # Search button and results
         if st.button("Search", type="primary") and query:
             with st.spinner("Searching documents..."):
                 # Pass the selected namespace (None for all documents)
-                results = rag.search_documents(query, namespace=selected_namespace)
+                results = rag.search_documents(query, namespace=selected_namespace, mode=search_mode)
                 
                 if results:
                     st.subheader(f"Found {len(results)} relevant chunks:")
@@ -549,13 +1730,30 @@ def main():
                     st.write("- Searching in a different document")
                     st.write("- Making sure documents are processed first")
         
-        # Show namespace statistics
+        # Documents indexed with another embedding model must be re-ingested before vector search works
+        for ns in namespaces:
+            mismatch = rag.embedding_mismatch(ns)
+            if mismatch:
+                st.error(mismatch)
+        
+        # Show namespace statistics from the local catalogue
         if namespaces:
+            catalogue = rag.get_namespace_catalogue()
             with st.expander("📊 Document Statistics"):
                 st.write(f"**Total documents processed:** {len(namespaces)}")
+                st.write(f"**Total vectors:** {sum(entry.get('vector_count') or 0 for entry in catalogue.values())}")
+                cache_stats = rag.retrieval_cache.stats()
+                st.write(f"**Retrieval cache:** {cache_stats['entries']} entries, "
+                         f"{cache_stats['hits']} hits, {cache_stats['misses']} misses")
                 for i, ns in enumerate(namespaces, 1):
                     readable_name = ns.replace("_", " ").title()
-                    st.write(f"{i}. {readable_name} (`{ns}`)")
+                    entry = catalogue.get(ns, {})
+                    details = f"{entry.get('vector_count') or 0} vectors"
+                    if entry.get("source_file"):
+                        details += f", from `{entry['source_file']}`"
+                    if entry.get("last_indexed"):
+                        details += f", indexed {entry['last_indexed'][:16].replace('T', ' ')}"
+                    st.write(f"{i}. {readable_name} (`{ns}`): {details}")
         
     except Exception as e:
         st.error(f"Error initializing RAG system: {e}")
@@ -0,0 +1,70 @@
+"""
+Retrieval result cache
+Process-wide LRU cache of per-namespace search results, shared by all
+Streamlit sessions through the shared DocumentRAG. Entries are keyed by
+namespace, normalized query text, top_k, search mode, metadata filter and the
+index version, so re-ingestion makes old entries unreachable and they age out.
+"""
+
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase words separated by single spaces, so case, punctuation and spacing do not matter"""
+    return " ".join(_WORD_RE.findall(query.lower()))
+
+
+class RetrievalCache:
+    """Thread-safe LRU cache of search results"""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(namespace: str, query: str, top_k: int, mode: str, index_version: str,
+                 metadata_filter: Optional[Dict[str, Any]] = None) -> Tuple:
+        filter_key = json.dumps(metadata_filter, sort_keys=True) if metadata_filter else ""
+        return (namespace, normalize_query(query), top_k, mode, filter_key, index_version)
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Cached results (as copies), or None"""
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [dict(result) for result in results]
+
+    def put(self, key: Tuple, results: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = [dict(result) for result in results]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,21 @@
+"""
+Configuration lookup
+Settings are read from Streamlit secrets first and from environment variables
+second, so the same code runs in the app, in scripts and in air-gapped setups.
+"""
+
+import os
+from typing import Any
+
+import streamlit as st
+
+
+def get_setting(name: str, default: Any = None) -> Any:
+    """Return a setting from st.secrets, then os.environ, then default"""
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        # No secrets.toml (scripts, tests): fall through to the environment
+        pass
+    return os.environ.get(name, default)
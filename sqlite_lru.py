@@ -0,0 +1,92 @@
+"""
+Size-capped SQLite store
+Base class for the persistent caches (embeddings, LLM responses): one SQLite
+table with a key, a stored value and a last-used time, kept below a size
+cap by least-recently-used eviction.
+"""
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SizeCappedStore:
+    """SQLite table with LRU eviction; subclasses define the table and add typed get/put methods"""
+
+    # Table name, the columns after its key (ending with "last_used REAL NOT NULL"),
+    # the column holding the stored value and a name for the entries in log messages
+    table = ""
+    columns = ""
+    value_column = ""
+    entry_name = "entries"
+
+    def __init__(self, path, max_bytes: int):
+        """
+        Args:
+            path: SQLite database file
+            max_bytes: Upper bound for the total size of stored values
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Stored values are counted as bytes, also when they are text
+        self._size = f"LENGTH(CAST({self.value_column} AS BLOB))"
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        # WAL lets the Streamlit sessions and ingestion/debug scripts share the file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, {self.columns})")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_used ON {self.table}(last_used)")
+        self._conn.commit()
+        # Running estimate of stored bytes, recomputed exactly before evicting
+        self._approx_bytes = self._stored_bytes()
+
+    def _added(self, size: int) -> None:
+        """Account for size bytes just written and evict if over the cap; call with the lock held"""
+        self._approx_bytes += size
+        if self._approx_bytes > self.max_bytes:
+            self._evict()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute(f"SELECT COALESCE(SUM({self._size}), 0) FROM {self.table}").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the store is below 90% of its cap"""
+        total = self._stored_bytes()
+        self._approx_bytes = total
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for key, size in self._conn.execute(
+            f"SELECT key, {self._size} FROM {self.table} ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= target:
+                break
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self._conn.commit()
+        self._approx_bytes = total
+        logger.info(f"Evicted {removed} {self.entry_name} from {self.path.name}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self._approx_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Number of stored entries and their total size in bytes"""
+        with self._lock:
+            count, size = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM({self._size}), 0) FROM {self.table}"
+            ).fetchone()
+        return {"entries": count, "bytes": size}
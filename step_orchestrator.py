@@ -0,0 +1,121 @@
+"""
+Concurrent step generation
+On Submit, the wizard steps that still need context or a generated response
+are processed together: document retrieval for all steps runs concurrently
+in worker threads, and each step is generated on an async OpenAI client as
+soon as the steps it depends on have their responses, so it sees their
+output in its progressive context while independent steps are generated at
+the same time. A timeout applies per step and a shared cap limits concurrent
+LLM calls.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List
+
+from generateresponse import agenerate_from_ai, get_async_client
+
+logger = logging.getLogger(__name__)
+
+# Concurrent LLM calls across all steps
+MAX_CONCURRENT_GENERATIONS = 4
+# Remaining retrieval plus generation of one step, once the steps it depends on are done
+STEP_TIMEOUT_SECONDS = 90.0
+
+
+async def _generate_step(job: Dict[str, Any], retrieval: "asyncio.Future",
+                         combine_context: Callable[[Dict[str, Any], Any, Dict[str, Any]], Dict[str, str]],
+                         responses: Dict[str, Any], async_client, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    document_context = await retrieval
+    context_data = await asyncio.to_thread(combine_context, job, document_context, responses)
+    data = None
+    if job.get("generate", True):
+        async with semaphore:
+            data = await agenerate_from_ai(async_client, job["label"], job["user_input"],
+                                           context_data["combined_context"], force=job.get("force", False))
+    return {"status": "success", "context": context_data, "data": data}
+
+
+async def _process_step(job: Dict[str, Any], tasks: Dict[str, "asyncio.Task"],
+                        build_context: Callable[[Dict[str, Any]], Any],
+                        combine_context: Callable[[Dict[str, Any], Any, Dict[str, Any]], Dict[str, str]],
+                        async_client, semaphore: asyncio.Semaphore, step_timeout_seconds: float) -> Dict[str, Any]:
+    start = time.perf_counter()
+    # Retrieval does not depend on other steps and starts right away; it is
+    # blocking (vector store, embeddings), so it runs in a worker thread
+    retrieval = asyncio.ensure_future(asyncio.to_thread(build_context, job))
+    try:
+        # Earlier steps generated in the same batch are waited for; their responses join the existing ones
+        responses = dict(job.get("responses") or {})
+        for label in job.get("depends_on", []):
+            if label in tasks:
+                outcome = await tasks[label]
+                if outcome["status"] == "success" and outcome["data"] is not None:
+                    responses[label] = outcome["data"]
+
+        outcome = await asyncio.wait_for(
+            _generate_step(job, retrieval, combine_context, responses, async_client, semaphore),
+            step_timeout_seconds
+        )
+        logger.info(f"Step '{job['label']}' processed in {time.perf_counter() - start:.2f}s")
+        return outcome
+    except asyncio.TimeoutError:
+        logger.error(f"Step '{job['label']}' timed out after {step_timeout_seconds}s")
+        return {"status": "timeout", "error": f"Timed out after {step_timeout_seconds:.0f}s"}
+    except Exception as e:
+        logger.error(f"Error processing step '{job['label']}': {e}")
+        return {"status": "error", "error": str(e)}
+
+
+async def _process_steps(jobs: List[Dict[str, Any]], build_context: Callable[[Dict[str, Any]], Any],
+                         combine_context: Callable[[Dict[str, Any], Any, Dict[str, Any]], Dict[str, str]],
+                         max_concurrency: int, step_timeout_seconds: float) -> List[Dict[str, Any]]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async_client = get_async_client()
+    tasks: Dict[str, asyncio.Task] = {}
+    try:
+        # Jobs come in step order, so a step's dependencies already have their tasks
+        for job in jobs:
+            tasks[job["label"]] = asyncio.create_task(_process_step(
+                job, dict(tasks), build_context, combine_context, async_client, semaphore, step_timeout_seconds
+            ))
+        return list(await asyncio.gather(*tasks.values()))
+    finally:
+        await async_client.close()
+
+
+def process_steps(jobs: List[Dict[str, Any]], build_context: Callable[[Dict[str, Any]], Any],
+                  combine_context: Callable[[Dict[str, Any], Any, Dict[str, Any]], Dict[str, str]],
+                  max_concurrency: int = MAX_CONCURRENT_GENERATIONS,
+                  step_timeout_seconds: float = STEP_TIMEOUT_SECONDS) -> Dict[str, Dict[str, Any]]:
+    """
+    Build context for, and optionally generate, several wizard steps
+
+    Retrieval runs for all steps at once; a step is generated when the steps
+    in its "depends_on" that are part of this batch are done.
+
+    Args:
+        jobs: One dict per step, in step order, with "label", "user_input",
+            "generate" (False to only build context), "depends_on" (labels of
+            the steps whose responses go into its context), "responses"
+            (existing responses by label) and optionally "force" (bypass the
+            LLM response cache); passed on to the callbacks
+        build_context: Retrieves the step's document context; runs in a worker
+            thread, so it must not touch st.session_state
+        combine_context: Called with (job, document context, responses by label)
+            once the dependencies are done; returns the step's context dict
+            ("combined_context", ...). Runs in a worker thread
+        max_concurrency: Concurrent LLM calls
+        step_timeout_seconds: Limit for each step, from the moment its dependencies are done
+
+    Returns:
+        Results by step label: {"status": "success", "context", "data"} or
+        {"status": "timeout" | "error", "error"}
+    """
+    if not jobs:
+        return {}
+    start = time.perf_counter()
+    results = asyncio.run(_process_steps(jobs, build_context, combine_context, max_concurrency, step_timeout_seconds))
+    logger.info(f"Processed {len(jobs)} steps in {time.perf_counter() - start:.2f}s")
+    return {job["label"]: result for job, result in zip(jobs, results)}
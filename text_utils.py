@@ -0,0 +1,41 @@
+"""
+Text helpers shared by the RAG pipeline
+Token counting uses tiktoken when it is installed and falls back to a
+character based estimate otherwise
+"""
+
+import logging
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Average characters per token for English/Swedish prose with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    """Load (once) the tiktoken encoding, or None when unavailable"""
+    if tiktoken is None:
+        logger.warning("tiktoken is not installed; token counts are estimated from text length")
+        return None
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding {encoding_name}, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, encoding_name: str = "cl100k_base") -> int:
+    """Count tokens in text, estimating from its length if tiktoken is missing"""
+    if not text:
+        return 0
+    encoding = _get_encoding(encoding_name)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
@@ -0,0 +1,271 @@
+"""
+In-process vector index
+A local stand-in for the parts of the Pinecone Index API that DocumentRAG
+uses (upsert, query, fetch, update, delete, describe_index_stats). Each
+namespace is a normalized float32 matrix saved as a memory-mapped .npy file
+next to a JSON file with the vector IDs and metadata, so a top-k query is a
+single matrix-vector product with no network round trip.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def matches_filter(metadata: Dict[str, Any], metadata_filter: Dict[str, Any]) -> bool:
+    """Evaluate a Pinecone-style metadata filter ($eq, $ne, $in, $nin, $and, $or)"""
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, operand in condition.items():
+            if operator == "$eq" and value != operand:
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$nin" and value in operand:
+                return False
+    return True
+
+
+class _Namespace:
+    """Vectors, IDs and metadata of one namespace"""
+
+    def __init__(self, dimension: int):
+        self.matrix = np.zeros((0, dimension), dtype=np.float32)
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}
+        self.stamp = None  # mtime of the files this state was loaded from
+
+    def reindex(self):
+        self.positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+
+
+class LocalVectorIndex:
+    """NumPy vector index with the Pinecone Index methods used by DocumentRAG"""
+
+    def __init__(self, path, dimension: int):
+        """
+        Args:
+            path: Directory holding one sub-directory per namespace
+            dimension: Vector dimension
+        """
+        self.path = Path(path)
+        self.dimension = dimension
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+
+    def _dir(self, namespace: str) -> Path:
+        # Namespaces are already filename-safe, but never trust them with a path
+        return self.path / (re.sub(r"[^\w\-]", "_", namespace) or "__default__")
+
+    def _load(self, namespace: str) -> _Namespace:
+        """Namespace state, reloaded if another process has written it since"""
+        directory = self._dir(namespace)
+        meta_path = directory / "meta.json"
+        stamp = meta_path.stat().st_mtime_ns if meta_path.exists() else None
+
+        state = self._namespaces.get(namespace)
+        if state is not None and state.stamp == stamp:
+            return state
+
+        state = _Namespace(self.dimension)
+        if stamp is not None:
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                state.matrix = np.load(directory / "vectors.npy", mmap_mode="r")
+                state.ids = meta["ids"]
+                state.metadata = meta["metadata"]
+                state.reindex()
+                state.stamp = stamp
+            except Exception as e:
+                logger.error(f"Error loading local namespace {namespace}: {e}")
+                state = _Namespace(self.dimension)
+        self._namespaces[namespace] = state
+        return state
+
+    def _save(self, namespace: str, state: _Namespace):
+        """Write a namespace atomically; vectors first so readers never see metadata without them"""
+        directory = self._dir(namespace)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        tmp_vectors = directory / "vectors.tmp.npy"
+        np.save(tmp_vectors, np.ascontiguousarray(state.matrix, dtype=np.float32))
+        os.replace(tmp_vectors, directory / "vectors.npy")
+
+        tmp_meta = directory / "meta.tmp.json"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"namespace": namespace, "ids": state.ids, "metadata": state.metadata}, f, ensure_ascii=False)
+        os.replace(tmp_meta, directory / "meta.json")
+
+        # Re-open memory-mapped so the in-memory copy can be released
+        state.matrix = np.load(directory / "vectors.npy", mmap_mode="r")
+        state.stamp = (directory / "meta.json").stat().st_mtime_ns
+
+    def _normalize(self, values) -> np.ndarray:
+        vectors = np.asarray(values, dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "") -> Dict[str, int]:
+        """Insert or overwrite vectors given as {"id", "values", "metadata"} dicts"""
+        if not vectors:
+            return {"upserted_count": 0}
+        with self._lock:
+            state = self._load(namespace)
+            matrix = np.array(state.matrix, dtype=np.float32)  # Writable copy of the mmap
+            new_rows = []
+            for vector in vectors:
+                row = self._normalize(vector["values"])[0]
+                position = state.positions.get(vector["id"])
+                if position is None:
+                    state.positions[vector["id"]] = len(state.ids)
+                    state.ids.append(vector["id"])
+                    state.metadata.append(dict(vector.get("metadata") or {}))
+                    new_rows.append(row)
+                else:
+                    position_in_new = position - len(matrix)
+                    if position_in_new >= 0:
+                        new_rows[position_in_new] = row
+                    else:
+                        matrix[position] = row
+                    state.metadata[position] = dict(vector.get("metadata") or {})
+            if new_rows:
+                matrix = np.vstack([matrix, np.stack(new_rows)])
+            state.matrix = matrix
+            self._save(namespace, state)
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector: List[float], top_k: int = 10, namespace: str = "", include_metadata: bool = False,
+              include_values: bool = False, filter: Optional[Dict[str, Any]] = None, **kwargs) -> SimpleNamespace:
+        """Top-k vectors by cosine similarity"""
+        with self._lock:
+            state = self._load(namespace)
+            matrix, ids, metadata = state.matrix, state.ids, state.metadata
+        if not ids or top_k <= 0:
+            return SimpleNamespace(matches=[], namespace=namespace)
+
+        scores = matrix @ self._normalize(vector)[0]
+        if filter:
+            mask = np.fromiter((matches_filter(m, filter) for m in metadata), dtype=bool, count=len(metadata))
+            scores = np.where(mask, scores, -np.inf)
+            top_k = min(top_k, int(mask.sum()))
+        if top_k <= 0:
+            return SimpleNamespace(matches=[], namespace=namespace)
+
+        top_k = min(top_k, len(ids))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = candidates[np.argsort(-scores[candidates], kind="stable")]
+        matches = [
+            SimpleNamespace(
+                id=ids[i],
+                score=float(scores[i]),
+                metadata=dict(metadata[i]) if include_metadata else None,
+                values=matrix[i].tolist() if include_values else [],
+            )
+            for i in best
+        ]
+        return SimpleNamespace(matches=matches, namespace=namespace)
+
+    def fetch(self, ids: List[str], namespace: str = "") -> SimpleNamespace:
+        """Vectors (values and metadata) by ID; missing IDs are left out"""
+        with self._lock:
+            state = self._load(namespace)
+            vectors = {
+                vector_id: SimpleNamespace(
+                    id=vector_id,
+                    values=state.matrix[state.positions[vector_id]].tolist(),
+                    metadata=dict(state.metadata[state.positions[vector_id]]),
+                )
+                for vector_id in ids if vector_id in state.positions
+            }
+        return SimpleNamespace(vectors=vectors, namespace=namespace)
+
+    def update(self, id: str, values: Optional[List[float]] = None, set_metadata: Optional[Dict[str, Any]] = None,
+               namespace: str = "") -> Dict[str, Any]:
+        """Replace a vector's values and/or merge keys into its metadata"""
+        with self._lock:
+            state = self._load(namespace)
+            position = state.positions.get(id)
+            if position is None:
+                return {}
+            if values is not None:
+                matrix = np.array(state.matrix, dtype=np.float32)
+                matrix[position] = self._normalize(values)[0]
+                state.matrix = matrix
+            if set_metadata:
+                state.metadata[position].update(set_metadata)
+            self._save(namespace, state)
+        return {}
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: str = "",
+               filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Delete vectors by ID or filter, or the whole namespace"""
+        with self._lock:
+            if delete_all:
+                directory = self._dir(namespace)
+                for name in ("meta.json", "vectors.npy"):
+                    if (directory / name).exists():
+                        (directory / name).unlink()
+                if directory.exists() and not any(directory.iterdir()):
+                    directory.rmdir()
+                self._namespaces.pop(namespace, None)
+                return {}
+
+            state = self._load(namespace)
+            doomed = {vector_id for vector_id in (ids or []) if vector_id in state.positions}
+            if filter:
+                doomed.update(i for i, m in zip(state.ids, state.metadata) if matches_filter(m, filter))
+            if not doomed:
+                return {}
+
+            keep = [i for i, vector_id in enumerate(state.ids) if vector_id not in doomed]
+            state.matrix = np.array(state.matrix[keep], dtype=np.float32)
+            state.ids = [state.ids[i] for i in keep]
+            state.metadata = [state.metadata[i] for i in keep]
+            state.reindex()
+            self._save(namespace, state)
+        return {}
+
+    def describe_index_stats(self, **kwargs) -> SimpleNamespace:
+        """Vector counts per namespace, like Pinecone's index stats"""
+        namespaces = {}
+        with self._lock:
+            for meta_path in sorted(self.path.glob("*/meta.json")):
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable namespace {meta_path.parent.name}: {e}")
+                    continue
+                if meta["ids"]:
+                    namespaces[meta["namespace"]] = SimpleNamespace(vector_count=len(meta["ids"]))
+        return SimpleNamespace(
+            namespaces=namespaces,
+            dimension=self.dimension,
+            total_vector_count=sum(ns.vector_count for ns in namespaces.values()),
+        )
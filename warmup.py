@@ -0,0 +1,205 @@
+"""
+Warm step context
+Runs the canonical retrieval queries of each wizard step (listed in
+sample.txt) against the step's namespaces ahead of time and keeps the results
+on disk, keyed by the index version. A wizard step can then use this baseline
+context at once and only add the hits that are specific to the user's input.
+Run at startup (start_warm_up) or from cron: python warmup.py
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Step heading ("1") and query ("...") lines at the top of sample.txt
+_STEP_RE = re.compile(r"^\d+$")
+_QUERY_RE = re.compile(r'^"(.+)"$')
+
+DEFAULT_QUERIES_PATH = Path(__file__).with_name("sample.txt")
+
+
+def parse_step_queries(path=DEFAULT_QUERIES_PATH) -> Dict[int, List[str]]:
+    """
+    Read the canonical step queries from the top of sample.txt
+
+    The file starts with a step number on its own line followed by quoted
+    queries, repeated for every step; parsing stops at the first other line.
+
+    Returns:
+        Queries by wizard step index (step "1" is index 0)
+    """
+    step_queries: Dict[int, List[str]] = {}
+    step = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if _STEP_RE.match(line):
+                step = int(line) - 1
+                step_queries.setdefault(step, [])
+                continue
+            match = _QUERY_RE.match(line)
+            if match is None or step is None:
+                break
+            step_queries[step].append(match.group(1))
+    return step_queries
+
+
+class WarmContext:
+    """Baseline search results per wizard step, persisted as JSON"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: JSON file holding the baselines
+        """
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._data = None
+        self._stamp = None
+
+    def _load(self) -> Dict[str, Any]:
+        """Stored baselines, reloaded if another process has written them since"""
+        stamp = self.path.stat().st_mtime_ns if self.path.exists() else None
+        if self._data is None or stamp != self._stamp:
+            self._data = {"index_version": None, "steps": {}}
+            if stamp is not None:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not read warm context, ignoring it: {e}")
+            self._stamp = stamp
+        return self._data
+
+    def get(self, step: int, index_version: str) -> Optional[List[Dict[str, Any]]]:
+        """Baseline results of a step, or None if missing or built for another index version"""
+        with self._lock:
+            data = self._load()
+            if data.get("index_version") != index_version:
+                return None
+            return data["steps"].get(str(step))
+
+    def is_current(self, index_version: str) -> bool:
+        with self._lock:
+            return self._load().get("index_version") == index_version
+
+    def store(self, index_version: str, steps: Dict[int, List[Dict[str, Any]]]) -> None:
+        """Replace all baselines"""
+        with self._lock:
+            self._data = {
+                "index_version": index_version,
+                "created_at": time.time(),
+                "steps": {str(step): results for step, results in steps.items()},
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._stamp = self.path.stat().st_mtime_ns
+
+
+def blend_results(baseline: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add user-specific hits to a step's baseline
+
+    Hits already in the baseline only raise its score; the others are added.
+    """
+    blended = {result["id"]: dict(result) for result in baseline}
+    for result in results:
+        current = blended.get(result["id"])
+        if current is None:
+            blended[result["id"]] = dict(result)
+        elif result["score"] > current["score"]:
+            current["score"] = result["score"]
+    return sorted(blended.values(), key=lambda result: -result["score"])
+
+
+def warm_up(rag, step_namespaces: Dict[int, List[str]], queries_path=DEFAULT_QUERIES_PATH,
+            top_k: int = 3) -> Dict[str, Any]:
+    """
+    Build and store the baseline context of every wizard step
+
+    Args:
+        rag: DocumentRAG instance
+        step_namespaces: Namespaces searched by each step
+        queries_path: File with the canonical step queries
+        top_k: Results per query and namespace
+
+    Returns:
+        Dict with status, the number of steps and queries, and the index version
+    """
+    try:
+        start = time.time()
+        index_version = rag.index_version
+        step_queries = parse_step_queries(queries_path)
+        queries = [
+            (step, query) for step, texts in step_queries.items()
+            if step_namespaces.get(step) for query in texts
+        ]
+        # One batched embedding request for all queries
+        embeddings, errors = rag.get_embeddings([query for _, query in queries])
+        if errors:
+            logger.warning(f"{len(errors)} warm-up queries could not be embedded, searching them lexically")
+
+        steps: Dict[int, List[Dict[str, Any]]] = {}
+        for (step, query), embedding in zip(queries, embeddings):
+            results = rag.search_namespaces(
+                query, step_namespaces[step], top_k=top_k, query_embedding=embedding,
+                mode=None if embedding is not None else "lexical"
+            )
+            steps[step] = blend_results(steps.get(step, []), results)
+
+        rag.warm_context.store(index_version, steps)
+        logger.info(f"Warmed {len(steps)} steps with {len(queries)} queries in {time.time() - start:.2f}s")
+        return {
+            "status": "success",
+            "steps": len(steps),
+            "queries": len(queries),
+            "index_version": index_version,
+        }
+
+    except Exception as e:
+        logger.error(f"Error warming step context: {e}")
+        return {"status": "error", "error": str(e)}
+
+
+_warm_up_lock = threading.Lock()
+_warm_up_thread: Optional[threading.Thread] = None
+
+
+def start_warm_up(rag, step_namespaces: Dict[int, List[str]], queries_path=DEFAULT_QUERIES_PATH) -> bool:
+    """
+    Warm the step context in a background thread unless it is current or already being warmed
+
+    Returns:
+        True if a warm-up was started
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is not None and _warm_up_thread.is_alive():
+            return False
+        if rag.warm_context.is_current(rag.index_version):
+            return False
+        _warm_up_thread = threading.Thread(
+            target=warm_up, args=(rag, step_namespaces, queries_path), name="warm-step-context", daemon=True
+        )
+        _warm_up_thread.start()
+        return True
+
+
+if __name__ == "__main__":
+    from rag import get_rag
+    from wizard import step_to_namespace_mapping
+
+    logging.basicConfig(level=logging.INFO)
+    print(warm_up(get_rag(), step_to_namespace_mapping))
@@ -1,9 +1,16 @@
 import streamlit as st
 import logging
+from typing import Any, Dict, List, Optional
 from openai import OpenAI
 from streamlit_extras.switch_page_button import switch_page
-from generateresponse import generate_from_ai, generate_work_packages_from_ai, generate_dashboard_data
-from rag import DocumentRAG
+from generateresponse import generate_from_ai, generate_work_packages_from_ai, generate_dashboard_data, DashboardData
+from rag import get_rag
+from exemplars import resolve_form_question
+from context_packer import pack_context
+from context_assembler import assemble_context, collect_facts
+from warmup import blend_results, start_warm_up
+from query_planner import plan_queries, planned_search
+from step_orchestrator import process_steps
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -43,21 +50,69 @@ step_to_namespace_mapping = {
     ]
 }
 
+# Earlier steps whose responses a step builds on; on Submit a step waits for these to be
+# generated, other steps are generated concurrently with it
+step_dependencies = {
+    0: [],
+    1: [],
+    2: [],
+    3: [],
+    4: [1],
+    5: [1, 3],
+}
+
+# Step to (form section, question prefix) whose answers in prior applications serve as examples
+step_to_exemplar_questions = {
+    0: [("Overview", "Summarize the project")],
+    1: [
+        ("Challenges and Needs", "Briefly describe your project goal"),
+        ("Challenges and Needs", "Describe the current situation"),
+    ],
+    2: [
+        ("Challenges and Needs", "Which challenge in the call for proposals"),
+        ("Overview", "In which municipality"),
+    ],
+    3: [
+        ("Target Group", "Describe the project's target group and their needs"),
+        ("Target Group", "How will you work to include the target group"),
+    ],
+    4: [
+        ("Challenges and Needs", "Justify the choice of Agenda 2030 goals"),
+        ("Working Method", "What risks have you identified"),
+    ],
+    5: [
+        ("Activities", "Description how the work package contributes to the project goal"),
+        ("Activities", "Description of activity"),
+        ("Working Method", "How are you going to work with communication"),
+    ],
+}
 
-def get_context_from_documents(step: int, user_input_text: str) -> str:
+# Exemplar answers added to the context of each step
+EXEMPLARS_PER_STEP = 2
+
+# Token budgets for the retrieved document passages and exemplar answers of a step
+CONTEXT_TOKEN_BUDGET = 1500
+EXEMPLAR_TOKEN_BUDGET = 600
+# Token budget for the previous steps' responses in a step's prompt
+PREVIOUS_RESPONSES_TOKEN_BUDGET = 1200
+
+
+def get_context_from_documents(step: int, user_input_text: str, queries: Optional[List[str]] = None) -> str:
     """
     Retrieve relevant context from classification documents based on wizard step.
     
     Args:
         step: Current wizard step (0-5)
         user_input_text: User's input text to search for relevant content
+        queries: Sub-queries (one per input field, see query_planner); their
+            rankings are fused instead of searching user_input_text as one query
     
     Returns:
         str: Combined relevant context from documents
     """
     try:
-        # Initialize RAG system
-        rag = DocumentRAG()
+        # Shared RAG system, connected once per process
+        rag = get_rag()
         
         # Get namespaces for this step
         namespaces = step_to_namespace_mapping.get(step, [])
@@ -66,26 +121,57 @@ def get_context_from_documents(step: int, user_input_text: str) -> str:
             logger.warning(f"No namespaces found for step {step}")
             return ""
         
-        # Combine content from all relevant namespaces for this step
-        combined_context = ""
+        # Baseline context from the canonical step queries, warmed in the background
+        baseline = rag.warm_context.get(step, rag.index_version)
+        if baseline is None:
+            start_warm_up(rag, step_to_namespace_mapping)
         
+        # Query all namespaces of this step concurrently; results cached by the shared RAG
+        # are reused and the input is only embedded for namespaces that are not cached
+        results = []
+        if queries:
+            # One batched embedding for all sub-queries, rankings fused per namespace
+            results = planned_search(rag, queries, namespaces, top_k=3)
+        elif user_input_text.strip() or baseline is None:
+            results = rag.search_namespaces(
+                user_input_text,
+                namespaces,
+                top_k=3  # Get top 3 most relevant chunks per namespace
+            )
+        if baseline is not None:
+            # User-specific hits are added to the baseline; ones it already has only lift its score
+            results = blend_results(baseline, results)
+        
+        # Merge adjacent chunks, drop repeated passages and keep the best within budget
+        passages = pack_context(results, CONTEXT_TOKEN_BUDGET)
+        
+        # Combine content from all relevant namespaces for this step, in mapping order
+        combined_context = ""
         for namespace in namespaces:
-            try:
-                # Search in this specific namespace
-                results = rag.search_documents(
-                    query=user_input_text,
-                    namespace=namespace,
-                    top_k=3  # Get top 3 most relevant chunks per namespace
-                )
-                
-                if results:
-                    combined_context += f"\n--- Context from {namespace.replace('_', ' ').title()} ---\n"
-                    for result in results:
-                        combined_context += f"{result['text']}\n\n"
-                
-            except Exception as e:
-                logger.error(f"Error searching namespace {namespace}: {e}")
-                continue
+            namespace_passages = [passage for passage in passages if passage["namespace"] == namespace]
+            if namespace_passages:
+                combined_context += f"\n--- Context from {namespace.replace('_', ' ').title()} ---\n"
+                for passage in namespace_passages:
+                    combined_context += f"{passage['text']}\n\n"
+        
+        # Add how prior applications answered the questions of this step
+        exemplars = rag.search_exemplars(
+            user_input_text,
+            form_questions=[
+                resolve_form_question(section, prefix)
+                for section, prefix in step_to_exemplar_questions.get(step, [])
+            ],
+            top_k=EXEMPLARS_PER_STEP
+        )
+        exemplar_passages = pack_context(
+            [dict(exemplar, text=f"[{exemplar['project_name']}] {exemplar['text']}") for exemplar in exemplars],
+            EXEMPLAR_TOKEN_BUDGET,
+            packed=passages
+        )
+        if exemplar_passages:
+            combined_context += "\n--- Examples From Prior Applications ---\n"
+            for passage in exemplar_passages:
+                combined_context += f"{passage['text']}\n\n"
         
         return combined_context.strip()
         
@@ -94,28 +180,60 @@ def get_context_from_documents(step: int, user_input_text: str) -> str:
         return ""
 
 
-def get_progressive_context(current_step: int, user_input_text: str) -> dict:
+def get_previous_responses(current_step: int, user_input_text: str = "",
+                           token_budget: int = PREVIOUS_RESPONSES_TOKEN_BUDGET,
+                           responses: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Previous steps' LLM responses from the session, within a token budget
+    
+    Each response field is a separate fact; facts are ranked by relevance to
+    the current step and by recency, and repeated text is included once.
+    
+    Args:
+        current_step: Current wizard step (0-5)
+        user_input_text: Current step's input, used to rank the facts
+        token_budget: Maximum tokens of previous responses
+        responses: Responses by step label; defaults to the session's generated data
+    
+    Returns:
+        str: Selected facts under a heading per step
+    """
+    if responses is None:
+        responses = st.session_state.generated_data
+    facts = []
+    for i in range(current_step):
+        step_label = wizard_steps[i]
+        if step_label in responses:
+            facts.extend(collect_facts(f"{step_label} (Previous Response)", responses[step_label]))
+    previous_responses = assemble_context(facts, f"{wizard_steps[current_step]} {user_input_text}", token_budget)
+    return f"{previous_responses}\n\n" if previous_responses else ""
+
+
+def get_progressive_context(current_step: int, user_input_text: str, queries: Optional[List[str]] = None,
+                            previous_responses: Optional[str] = None,
+                            current_context: Optional[str] = None) -> dict:
     """
     Build progressive context that includes:
     1. Current step's document context
     2. All previous steps' LLM responses
     3. Current step's user input
     
+    queries are passed on to get_context_from_documents. Pass previous_responses
+    (see get_previous_responses) to build the context outside the script thread,
+    where st.session_state is not available, and current_context to reuse
+    document context that was already retrieved.
+    
     Returns:
         dict: Contains current_context, previous_responses, and combined_context
     """
     try:
         # Get current step's document context
-        current_context = get_context_from_documents(current_step, user_input_text)
+        if current_context is None:
+            current_context = get_context_from_documents(current_step, user_input_text, queries)
         
-        # Get all previous steps' LLM responses
-        previous_responses = ""
-        for i in range(current_step):
-            step_label = wizard_steps[i]
-            if step_label in st.session_state.generated_data:
-                previous_responses += f"\n--- {step_label} (Previous Response) ---\n"
-                previous_responses += str(st.session_state.generated_data[step_label])
-                previous_responses += "\n\n"
+        # Get the previous steps' LLM responses most relevant to this step
+        if previous_responses is None:
+            previous_responses = get_previous_responses(current_step, user_input_text)
         
         # Combine everything for comprehensive context
         combined_context = ""
@@ -474,6 +592,9 @@ def wizard_ui():
         ):
             disable_next = True
 
+    # Unchanged steps reuse cached AI responses unless regeneration is forced
+    force_regenerate = st.checkbox("🔄 Force regenerate (ignore cached AI responses)", key="force_regenerate")
+
     col1, col2, col3 = st.columns([1, 3, 1])
     with col1:
         if step > 0 and st.button("◀ Previous"):
@@ -486,17 +607,11 @@ def wizard_ui():
             user_input_obj = st.session_state.user_data[step_label]
             
             with st.spinner("Generating content with context from previous steps..."):
-                # Create search query from user input
-                search_query = ""
-                if isinstance(user_input_obj, dict):
-                    for key, value in user_input_obj.items():
-                        if isinstance(value, str) and value.strip():
-                            search_query += f"{value} "
-                        elif isinstance(value, list):
-                            search_query += " ".join([str(v) for v in value if v]) + " "
+                # One sub-query per input field, searched together and fused
+                queries = plan_queries(user_input_obj)
                 
                 # Get progressive context (includes previous responses + current documents)
-                context_data = get_progressive_context(step, search_query.strip())
+                context_data = get_progressive_context(step, " ".join(queries), queries)
                 
                 # Store individual step context
                 st.session_state.step_contexts[step_label] = {
@@ -505,7 +620,8 @@ def wizard_ui():
                 }
                 
                 # Generate AI response with progressive context
-                ai_data = generate_from_ai(step_label, user_input_obj, context_data["combined_context"])
+                ai_data = generate_from_ai(step_label, user_input_obj, context_data["combined_context"],
+                                           force=force_regenerate)
                 
                 st.session_state.generated_data[step_label] = ai_data
                 section_name = section_mapping.get(step, step_label)
@@ -516,59 +632,68 @@ def wizard_ui():
 
         elif step == len(wizard_steps) - 1 and st.button("✅ Submit"):
             with st.spinner("Finalizing all content with AI..."):
-                # First ensure all individual steps are generated
+                # First ensure all individual steps are generated; document context is
+                # retrieved for all steps concurrently and each step is generated once
+                # the steps it depends on have their responses
                 all_contexts = {}
+                jobs = []
                 
                 for i, label in enumerate(wizard_steps):
-                    if label not in st.session_state.generated_data:
-                        user_input_obj = st.session_state.user_data.get(label, {})
-                        
-                        # Create search query for final processing
-                        search_query = ""
-                        if isinstance(user_input_obj, dict):
-                            for key, value in user_input_obj.items():
-                                if isinstance(value, str) and value.strip():
-                                    search_query += f"{value} "
-                                elif isinstance(value, list):
-                                    search_query += " ".join([str(v) for v in value if v]) + " "
-                        
-                        # Get progressive context for this step
-                        context_data = get_progressive_context(i, search_query.strip())
-                        all_contexts[label] = context_data["combined_context"]
-                        
-                        # Store individual step context
-                        st.session_state.step_contexts[label] = {
-                            "document_context": context_data["current_context"],
-                            "progressive_context": context_data["combined_context"]
-                        }
-                        
-                        # Generate AI response with progressive context
-                        ai_data = generate_from_ai(label, user_input_obj, context_data["combined_context"])
+                    generate = label not in st.session_state.generated_data
+                    if not generate and label in st.session_state.step_contexts:
+                        # Use existing context if available
+                        all_contexts[label] = st.session_state.step_contexts[label]["progressive_context"]
+                        continue
+                    
+                    user_input_obj = st.session_state.user_data.get(label, {})
+                    # Sub-queries for final processing
+                    queries = plan_queries(user_input_obj)
+                    jobs.append({
+                        "step": i,
+                        "label": label,
+                        "user_input": user_input_obj,
+                        "queries": queries,
+                        # Earlier steps' responses; those of its dependencies generated in this batch are added when ready
+                        "depends_on": [wizard_steps[dependency] for dependency in step_dependencies[i]],
+                        "responses": {
+                            previous: st.session_state.generated_data[previous]
+                            for previous in wizard_steps[:i] if previous in st.session_state.generated_data
+                        },
+                        "generate": generate,
+                        "force": force_regenerate,
+                    })
+                
+                step_results = process_steps(
+                    jobs,
+                    lambda job: get_context_from_documents(job["step"], " ".join(job["queries"]), job["queries"]),
+                    lambda job, document_context, responses: get_progressive_context(
+                        job["step"], " ".join(job["queries"]), job["queries"],
+                        get_previous_responses(job["step"], " ".join(job["queries"]), responses=responses),
+                        document_context
+                    )
+                )
+                
+                for job in jobs:
+                    label = job["label"]
+                    result = step_results[label]
+                    if result["status"] != "success":
+                        st.warning(f"Step '{label}' could not be completed: {result['error']}")
+                        continue
+                    
+                    context_data = result["context"]
+                    all_contexts[label] = context_data["combined_context"]
+                    
+                    # Store individual step context
+                    st.session_state.step_contexts[label] = {
+                        "document_context": context_data["current_context"],
+                        "progressive_context": context_data["combined_context"]
+                    }
+                    
+                    if job["generate"]:
+                        ai_data = result["data"]
                         st.session_state.generated_data[label] = ai_data
-                        section_name = section_mapping.get(i, label)
+                        section_name = section_mapping.get(job["step"], label)
                         st.session_state.edited_sections[section_name] = ai_data
-                    else:
-                        # Use existing context if available, otherwise get new progressive context
-                        if label in st.session_state.step_contexts:
-                            all_contexts[label] = st.session_state.step_contexts[label]["progressive_context"]
-                        else:
-                            user_input_obj = st.session_state.user_data.get(label, {})
-                            search_query = ""
-                            if isinstance(user_input_obj, dict):
-                                for key, value in user_input_obj.items():
-                                    if isinstance(value, str) and value.strip():
-                                        search_query += f"{value} "
-                                    elif isinstance(value, list):
-                                        search_query += " ".join([str(v) for v in value if v]) + " "
-                            
-                            context_data = get_progressive_context(i, search_query.strip())
-                            all_contexts[label] = context_data["combined_context"]
-                            
-                            # Store individual step context
-                            st.session_state.step_contexts[label] = {
-                                "document_context": context_data["current_context"],
-                                "progressive_context": context_data["combined_context"]
-                            }
 
                 # Generate comprehensive dashboard data using all wizard data and contexts
                 st.info("🔄 Generating comprehensive dashboard content from all wizard steps...")
@@ -579,7 +704,25 @@ def wizard_ui():
                     "step_contexts": st.session_state.step_contexts  # Include individual contexts
                 }
                 
-                dashboard_data = generate_dashboard_data(combined_wizard_data, all_contexts)
+                # Fields are shown as they stream in, so completed content can be read
+                # while the rest is still being generated. A section that fails after
+                # streaming some fields publishes its defaults, which replace them
+                field_placeholders = {}
+                total_fields = len(DashboardData.model_fields)
+                progress = st.progress(0.0, text="Waiting for the first dashboard fields...")
+                arrived_fields = st.container()
+                
+                def publish_field(name, value):
+                    if name not in field_placeholders:
+                        field_placeholders[name] = arrived_fields.empty()
+                    ready = len(field_placeholders)
+                    progress.progress(min(ready / total_fields, 1.0), text=f"{ready}/{total_fields} dashboard fields ready")
+                    with field_placeholders[name].container():
+                        with st.expander(name.replace('_', ' ').capitalize()):
+                            st.write(value)
+                
+                dashboard_data = generate_dashboard_data(combined_wizard_data, all_contexts, on_field=publish_field,
+                                                         force=force_regenerate)
                 st.session_state["dashboard_data"] = dashboard_data
                 
                 st.session_state["wizard_complete"] = True